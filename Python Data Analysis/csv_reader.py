@@ -0,0 +1,258 @@
+"""
+Dialect-sniffing CSV reader for the Data Analysis tables.
+
+The same tables come in several dialects: hightemp.csv is plain
+comma-separated, hightemp2.csv pads its quoted fields with spaces,
+hightemp3.csv and number_table.csv are space-separated (hightemp3.csv
+with single quotes), and the name_table_* files quote every field, only
+the fields that need it, or none.  Instead of passing the separator and
+quote character by hand, the functions here sniff the dialect from a
+sample of the file once, remember it until the file changes, and parse
+the file through a large read buffer.  Columns whose values are all
+integers or all numbers are converted to int or float.
+
+Usage, from this folder:
+    read_csv_as_nested_dict("hightemp3.csv", "City")
+    read_csv_as_list("number_table.csv")
+    read_csv_as_list_dict("Master_2016.csv")
+
+Parsed tables are cached and shared between callers, so they must be
+treated as read-only.
+"""
+
+import csv
+import os
+import re
+from collections import OrderedDict
+
+SNIFF_SAMPLE_SIZE = 1 << 16
+READ_BUFFER_SIZE = 1 << 20
+DELIMITERS = ",;\t| "
+TABLE_CACHE_SIZE = 8
+
+# Integer columns become Python ints, which keep every digit; a column that
+# also holds decimals becomes float only if its integers convert exactly.
+# Zero-padded codes ("01001") do not match, so their columns stay text
+_INT_PATTERN = re.compile(r"[-+]?(?:0|[1-9]\d*)\Z")
+_FLOAT_PATTERN = re.compile(r"[-+]?(?:(?:0|[1-9]\d*)(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?\Z")
+
+_DIALECT_CACHE = {}
+_TABLE_CACHE = OrderedDict()
+
+
+def _file_stamp(path):
+    """
+    Output:
+      Returns a tuple identifying the current version of the file.
+    """
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _sniff(path):
+    """
+    Inputs:
+      path - Absolute name of CSV file
+
+    Output:
+      Returns a tuple (fmtparams, has_header) for the file, where
+      fmtparams is a dictionary of csv.reader formatting parameters.
+    """
+    with open(path, "r", newline="") as csvfile:
+        sample = csvfile.read(SNIFF_SAMPLE_SIZE)
+    # Drop a final line cut off by the sample size
+    if len(sample) == SNIFF_SAMPLE_SIZE and "\n" in sample:
+        sample = sample[:sample.rindex("\n") + 1]
+    sniffer = csv.Sniffer()
+    try:
+        dialect = sniffer.sniff(sample, delimiters=DELIMITERS)
+        has_header = sniffer.has_header(sample)
+    except csv.Error:
+        return {"delimiter": ",", "quotechar": '"', "skipinitialspace": False,
+                "doublequote": True}, False
+    # Space-separated files are padded with runs of spaces, which must not
+    # produce empty fields; the sniffer only reports doubled quotes when it
+    # sees them, but reading them as such is always safe
+    fmtparams = {"delimiter": dialect.delimiter, "quotechar": dialect.quotechar or '"',
+                 "skipinitialspace": dialect.skipinitialspace or dialect.delimiter == " ",
+                 "doublequote": True}
+    return fmtparams, has_header
+
+
+def sniff_dialect(filename):
+    """
+    Inputs:
+      filename - Name of CSV file
+
+    Output:
+      Returns a tuple (fmtparams, has_header): a dictionary with the
+      delimiter, quotechar, skipinitialspace and doublequote settings to
+      pass to csv.reader, and whether the first row looks like a header.
+
+      The result is remembered until the file is modified.
+    """
+    path = os.path.abspath(filename)
+    stamp = _file_stamp(path)
+    entry = _DIALECT_CACHE.get(path)
+    if entry is None or entry[0] != stamp:
+        entry = _DIALECT_CACHE[path] = (stamp, _sniff(path))
+    return entry[1]
+
+
+def _column_converter(values):
+    """
+    Inputs:
+      values - List of strings from one column
+
+    Output:
+      Returns int if every non-empty value is an integer, float if every
+      non-empty value is a number and every integer among them converts
+      to float exactly, else None.  A column of empty values is left as
+      text.
+    """
+    present = [value for value in values if value != ""]
+    if not present:
+        return None
+    if all(_INT_PATTERN.match(value) for value in present):
+        return int
+    if all(_FLOAT_PATTERN.match(value) for value in present):
+        if all(float(value) == int(value) for value in present
+               if _INT_PATTERN.match(value)):
+            return float
+    return None
+
+
+def infer_types(rows):
+    """
+    Inputs:
+      rows - List of rows, each a list of strings
+
+    Output:
+      Returns a new list of rows in which the columns that hold only
+      numbers are converted to int or float.  Empty fields in those
+      columns become None.
+    """
+    width = max((len(row) for row in rows), default=0)
+    converters = [_column_converter([row[col] for row in rows if col < len(row)])
+                  for col in range(width)]
+    if not any(converters):
+        return [list(row) for row in rows]
+    typed = []
+    for row in rows:
+        typed.append([value if convert is None else
+                      (convert(value) if value != "" else None)
+                      for value, convert in zip(row, converters)])
+    return typed
+
+
+def _parse(path, fmtparams, header, convert):
+    """
+    Output:
+      Returns a tuple (fieldnames, rows) for the file, with fieldnames
+      the header row or None, and rows the remaining rows.
+    """
+    with open(path, "r", newline="", buffering=READ_BUFFER_SIZE) as csvfile:
+        rows = list(csv.reader(csvfile, **fmtparams))
+    fieldnames = rows.pop(0) if header and rows else None
+    if convert:
+        rows = infer_types(rows)
+    return fieldnames, rows
+
+
+def read_table(filename, header=None, convert=True):
+    """
+    Inputs:
+      filename - Name of CSV file
+      header   - True if the first row holds the field names, False if
+                 not, or None to use the sniffed guess
+      convert  - If True, convert numeric columns to int or float
+
+    Output:
+      Returns a tuple (fieldnames, rows), where fieldnames is the list of
+      field names (None without a header) and rows is the list of the
+      remaining rows.
+
+      The table is cached on the file path, its modification time and
+      the options, so a file is only parsed again once it changes.
+    """
+    path = os.path.abspath(filename)
+    fmtparams, has_header = sniff_dialect(path)
+    if header is None:
+        header = has_header
+    key = (path, _file_stamp(path), header, convert)
+    if key in _TABLE_CACHE:
+        _TABLE_CACHE.move_to_end(key)
+        return _TABLE_CACHE[key]
+    table = _parse(path, fmtparams, header, convert)
+    _TABLE_CACHE[key] = table
+    while len(_TABLE_CACHE) > TABLE_CACHE_SIZE:
+        _TABLE_CACHE.popitem(last=False)
+    return table
+
+
+def read_csv_as_list(filename, convert=True):
+    """
+    Inputs:
+      filename - Name of CSV file
+      convert  - If True, convert numeric columns to int or float
+
+    Output:
+      Returns a list of lists with every row of the CSV file, including
+      a header row if there is one.
+    """
+    fieldnames, rows = read_table(filename, None, convert)
+    if fieldnames is None:
+        return [list(row) for row in rows]
+    return [list(fieldnames)] + [list(row) for row in rows]
+
+
+def read_csv_fieldnames(filename):
+    """
+    Inputs:
+      filename - Name of CSV file
+
+    Output:
+      Returns a list of strings corresponding to the field names in
+      the first row of the CSV file.
+    """
+    fieldnames, _ = read_table(filename, True)
+    return list(fieldnames or [])
+
+
+def read_csv_as_list_dict(filename, convert=True):
+    """
+    Inputs:
+      filename - Name of CSV file
+      convert  - If True, convert numeric columns to int or float
+
+    Output:
+      Returns a list of dictionaries where each item in the list
+      corresponds to a row in the CSV file.  The dictionaries in the
+      list map the field names to the field values for that row.
+    """
+    fieldnames, rows = read_table(filename, True, convert)
+    return [dict(zip(fieldnames, row)) for row in rows]
+
+
+def read_csv_as_nested_dict(filename, keyfield, convert=True):
+    """
+    Inputs:
+      filename - Name of CSV file
+      keyfield - Field to use as key for rows
+      convert  - If True, convert numeric columns to int or float
+
+    Output:
+      Returns a dictionary of dictionaries where the outer dictionary
+      maps the value in the key_field to the corresponding row in the
+      CSV file.  The inner dictionaries map the field names to the
+      field values for that row.  An empty file gives an empty
+      dictionary.
+    """
+    fieldnames, rows = read_table(filename, True, convert)
+    if fieldnames is None:
+        return {}
+    key_col = fieldnames.index(keyfield)
+    nested_dict = {}
+    for row in rows:
+        nested_dict[row[key_col]] = dict(zip(fieldnames, row))
+    return nested_dict
@@ -0,0 +1,229 @@
+"""
+Indexed queries over the player records in Master_2016.csv.
+
+Answering a question such as "players born in Ohio who debuted in the
+1950s" by scanning every row of the nested dictionary returned by
+read_csv_as_nested_dict takes time proportional to the whole table.
+A PlayerTable loads the file once through csv_reader and builds
+
+  - hash indexes on categorical columns (birthCountry, birthState,
+    bats, throws, ...), mapping each value to the sorted row numbers
+    holding it, and
+  - sorted indexes on numeric and date columns (birthYear, weight,
+    debut, ...), searched with bisect,
+
+so filter, range and top-k queries only touch the rows they return.
+Every query is timed and the timings are kept in the table's log.
+
+Usage, from this folder:
+    players = PlayerTable("Master_2016.csv")
+    players.filter(birthState="OH", bats="L")
+    players.range("debut", "1950-01-01", "1959-12-31")
+    players.top_k("weight", 5)
+    players.select({"birthCountry": "USA"}, {"birthYear": (1980, None)})
+    print_log(players)
+"""
+
+import bisect
+import time
+import csv_reader
+
+CATEGORICAL_COLUMNS = ["birthCountry", "birthState", "birthCity", "deathCountry",
+                       "deathState", "bats", "throws"]
+SORTED_COLUMNS = ["birthYear", "birthMonth", "birthDay", "deathYear", "weight",
+                  "height", "debut", "finalGame"]
+
+
+class PlayerTable:
+    """
+    Table of player records with hash and sorted indexes
+    """
+
+    def __init__(self, filename, keyfield="playerID",
+                 categorical=CATEGORICAL_COLUMNS, ordered=SORTED_COLUMNS):
+        """
+        Inputs:
+          filename    - Name of CSV file with a header row
+          keyfield    - Field holding the unique key of each row
+          categorical - Columns to index by value
+          ordered     - Numeric or ISO date columns to index in sorted order
+        """
+        start = time.perf_counter()
+        self.fieldnames, self.rows = csv_reader.read_table(filename, True)
+        self.columns = {name: col for col, name in enumerate(self.fieldnames)}
+        self.keys = {}
+        key_col = self.columns[keyfield]
+        for pos, row in enumerate(self.rows):
+            self.keys[row[key_col]] = pos
+        self.hash_indexes = {}
+        for name in categorical:
+            self.hash_indexes[name] = self._build_hash_index(self.columns[name])
+        self.sorted_indexes = {}
+        for name in ordered:
+            self.sorted_indexes[name] = self._build_sorted_index(self.columns[name])
+        self.log = [("load " + filename, len(self.rows), time.perf_counter() - start)]
+
+    def _build_hash_index(self, col):
+        """
+        Output:
+          Returns a dictionary mapping each non-empty value of column col
+          to the ascending list of row numbers holding it.
+        """
+        index = {}
+        for pos, row in enumerate(self.rows):
+            value = row[col]
+            if value != "" and value is not None:
+                index.setdefault(value, []).append(pos)
+        return index
+
+    def _build_sorted_index(self, col):
+        """
+        Output:
+          Returns a tuple (values, positions) of parallel lists holding the
+          non-empty values of column col in ascending order and the row
+          number of each.
+        """
+        pairs = sorted((row[col], pos) for pos, row in enumerate(self.rows)
+                       if row[col] != "" and row[col] is not None)
+        return [value for value, _ in pairs], [pos for _, pos in pairs]
+
+    def _record(self, description, positions, start):
+        """
+        Output:
+          Returns the rows at positions as dictionaries, after logging the
+          query with its row count and the time elapsed since start.
+        """
+        result = [dict(zip(self.fieldnames, self.rows[pos])) for pos in positions]
+        self.log.append((description, len(result), time.perf_counter() - start))
+        return result
+
+    def _matching(self, where):
+        """
+        Inputs:
+          where - Dictionary mapping indexed categorical columns to values
+
+        Output:
+          Returns the set of row numbers matching every condition, or None
+          if where is empty.  Posting lists are intersected smallest first.
+        """
+        if not where:
+            return None
+        postings = sorted((self.hash_indexes[name].get(value, []) for name, value in where.items()),
+                          key=len)
+        matches = set(postings[0])
+        for posting in postings[1:]:
+            matches.intersection_update(posting)
+            if not matches:
+                break
+        return matches
+
+    def _in_range(self, column, low, high):
+        """
+        Output:
+          Returns the slice of the sorted index of column covering the
+          values from low to high inclusive (None for an open end).
+        """
+        values, positions = self.sorted_indexes[column]
+        first = 0 if low is None else bisect.bisect_left(values, low)
+        last = len(values) if high is None else bisect.bisect_right(values, high)
+        return positions[first:last]
+
+    def get(self, key):
+        """
+        Output:
+          Returns the row with the given key as a dictionary, or None.
+        """
+        start = time.perf_counter()
+        pos = self.keys.get(key)
+        result = self._record("get " + str(key), [] if pos is None else [pos], start)
+        return result[0] if result else None
+
+    def filter(self, **where):
+        """
+        Inputs:
+          where - Keyword arguments mapping categorical columns to values
+
+        Output:
+          Returns the rows, in file order, whose columns equal every given value.
+        """
+        start = time.perf_counter()
+        matches = self._matching(where)
+        positions = range(len(self.rows)) if matches is None else sorted(matches)
+        return self._record("filter " + str(where), positions, start)
+
+    def range(self, column, low=None, high=None):
+        """
+        Inputs:
+          column - Column with a sorted index
+          low    - Smallest value to return, or None
+          high   - Largest value to return, or None
+
+        Output:
+          Returns the rows whose value in column lies between low and high
+          inclusive, in ascending order of that value.
+        """
+        start = time.perf_counter()
+        positions = self._in_range(column, low, high)
+        return self._record("range " + column + " " + str((low, high)), positions, start)
+
+    def top_k(self, column, k, largest=True, where=None):
+        """
+        Inputs:
+          column  - Column with a sorted index
+          k       - Number of rows to return
+          largest - True for the largest values, False for the smallest
+          where   - Optional dictionary of categorical conditions
+
+        Output:
+          Returns at most k rows ordered by their value in column, largest
+          first if largest is True.  Rows with an empty value are skipped.
+        """
+        start = time.perf_counter()
+        matches = self._matching(where)
+        positions = self.sorted_indexes[column][1]
+        ordered = reversed(positions) if largest else iter(positions)
+        found = []
+        for pos in ordered:
+            if len(found) == k:
+                break
+            if matches is None or pos in matches:
+                found.append(pos)
+        description = "top " + str(k) + " " + column + ("" if not where else " " + str(where))
+        return self._record(description, found, start)
+
+    def select(self, where=None, ranges=None):
+        """
+        Inputs:
+          where  - Optional dictionary mapping categorical columns to values
+          ranges - Optional dictionary mapping sorted columns to (low, high)
+                   tuples, inclusive, with None for an open end
+
+        Output:
+          Returns the rows, in file order, that satisfy every condition.
+          The conditions are combined by intersecting row number sets,
+          starting with the smallest.
+        """
+        start = time.perf_counter()
+        candidates = []
+        matches = self._matching(where)
+        if matches is not None:
+            candidates.append(matches)
+        for column, (low, high) in (ranges or {}).items():
+            candidates.append(self._in_range(column, low, high))
+        if not candidates:
+            positions = range(len(self.rows))
+        else:
+            candidates.sort(key=len)
+            result = set(candidates[0])
+            for candidate in candidates[1:]:
+                result.intersection_update(candidate)
+            positions = sorted(result)
+        return self._record("select " + str(where) + " " + str(ranges), positions, start)
+
+
+def print_log(table):
+    """
+    Print every query logged by table with its row count and time in milliseconds
+    """
+    for description, count, seconds in table.log:
+        print("{:>9.3f} ms {:>6} rows  {}".format(seconds * 1000, count, description))
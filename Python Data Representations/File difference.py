@@ -8,8 +8,26 @@ Be sure to read the project description page for further information
 about the expected behavior of the program.
 """
 
+import bisect
+import hashlib
+import itertools
+import locale
+import mmap
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
 IDENTICAL = -1
 
+# Size in bytes of the read buffer used when streaming files
+STREAM_BUFFER_SIZE = 1 << 20
+
+# Size in bytes of the blocks compared at once by the mmap engine
+COMPARE_BLOCK_SIZE = 1 << 16
+
+# Edit distance up to which diff_hunks searches for a minimal diff
+MAX_EDIT_COST = 1024
+
 def singleline_diff(line1, line2):
     """
     Inputs:
@@ -137,8 +155,7 @@ def file_diff_format(filename1, filename2):
     list2 = get_file_lines(filename2)
     if list1 == list2:
         return "No differences\n"
-    line = multiline_diff(list1, list2)[0]
-    idx = multiline_diff(list1, list2)[1]
+    line, idx = multiline_diff(list1, list2)
     line1 = "Line " + str(line) + ":\n"
     if line == len(list1):
         list1.append("")
@@ -151,3 +168,601 @@ def file_diff_format(filename1, filename2):
 # filename2 = "hm2.txt"
 # print(file_diff_format(filename1, filename2))
 # =============================================================================
+
+
+def _strip_newline(line):
+    """
+    Inputs:
+      line - line read from a text file, or None past the end of file
+    Output:
+      Returns line without its trailing newline, as get_file_lines
+      would store it.  Returns None unchanged.
+    """
+    if line is not None and line.endswith("\n"):
+        return line[:-1]
+    return line
+
+def file_diff_format_streaming(filename1, filename2, buffer_size=STREAM_BUFFER_SIZE):
+    """
+    Inputs:
+      filename1   - name of first file
+      filename2   - name of second file
+      buffer_size - size in bytes of the read buffer for each file
+    Output:
+      Returns the same string as file_diff_format.
+
+      Both files are read in lockstep through buffered reads and the
+      comparison stops at the first differing line, so memory use does
+      not depend on the size of the files.
+    """
+    with open(filename1, "rt", buffering=buffer_size) as file1, \
+         open(filename2, "rt", buffering=buffer_size) as file2:
+        for line, (line1, line2) in enumerate(itertools.zip_longest(file1, file2)):
+            line1 = _strip_newline(line1)
+            line2 = _strip_newline(line2)
+            if line1 == line2:
+                continue
+            if line1 is None or line2 is None:
+                idx = 0
+                line1 = line1 or ""
+                line2 = line2 or ""
+            else:
+                idx = singleline_diff(line1, line2)
+            return "Line " + str(line) + ":\n" + singleline_diff_format(line1, line2, idx)
+    return "No differences\n"
+
+# =============================================================================
+# filename1 = "hm1.txt"
+# filename2 = "hm2.txt"
+# print(file_diff_format_streaming(filename1, filename2))
+# =============================================================================
+
+
+def _map_file(file):
+    """
+    Inputs:
+      file - file object opened in binary mode
+    Output:
+      Returns a read-only memory map of the file, or an empty bytes
+      object for an empty file (which cannot be mapped).
+    """
+    if file.seek(0, 2) == 0:
+        return b""
+    return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+def first_difference_offset(data1, data2, block_size=COMPARE_BLOCK_SIZE):
+    """
+    Inputs:
+      data1      - first bytes-like buffer (bytes or mmap)
+      data2      - second bytes-like buffer (bytes or mmap)
+      block_size - number of bytes compared at once
+    Output:
+      Returns the offset of the first byte at which data1 and data2
+      differ, or the length of the shorter buffer if one is a prefix
+      of the other.
+
+      Returns IDENTICAL if the two buffers are the same.
+    """
+    minlen = min(len(data1), len(data2))
+    for start in range(0, minlen, block_size):
+        end = min(start + block_size, minlen)
+        block1 = data1[start:end]
+        block2 = data2[start:end]
+        if block1 != block2:
+            low, high = 0, end - start
+            while high - low > 1:
+                mid = (low + high) // 2
+                if block1[low:mid] == block2[low:mid]:
+                    low = mid
+                else:
+                    high = mid
+            return start + low
+    if len(data1) == len(data2):
+        return IDENTICAL
+    return minlen
+
+def _count_newlines(data, end, block_size=STREAM_BUFFER_SIZE):
+    """
+    Inputs:
+      data       - bytes-like buffer
+      end        - offset to stop counting at
+      block_size - number of bytes counted at once
+    Output:
+      Returns the number of newline bytes in data[:end].
+    """
+    count = 0
+    for start in range(0, end, block_size):
+        count += data[start:min(start + block_size, end)].count(b"\n")
+    return count
+
+def _line_at(data, start, encoding):
+    """
+    Inputs:
+      data     - bytes-like buffer
+      start    - offset of the start of a line
+      encoding - text encoding of the buffer
+    Output:
+      Returns a tuple of the decoded line starting at start, without
+      its "\n" or "\r\n" ending, and the offset of the next line.
+      Returns (None, start) if start is at the end of data, as there
+      is no line there.
+    """
+    if start >= len(data):
+        return None, start
+    end = data.find(b"\n", start)
+    if end == -1:
+        end = len(data)
+    stop = end
+    if stop > start and data[stop - 1:stop] == b"\r":
+        stop -= 1
+    return data[start:stop].decode(encoding), end + 1
+
+def file_diff_format_mmap(filename1, filename2, block_size=COMPARE_BLOCK_SIZE):
+    """
+    Inputs:
+      filename1  - name of first file
+      filename2  - name of second file
+      block_size - number of bytes compared at once
+    Output:
+      Returns the same string as file_diff_format.
+
+      Both files are memory-mapped and compared block by block, then
+      the first differing byte is located by binary search inside the
+      differing block and mapped back to a line number.  From that
+      line on, lines are compared one at a time with their "\n" or
+      "\r\n" endings removed, so files that only differ in their line
+      endings have no differences.
+    """
+    encoding = locale.getpreferredencoding(False)
+    with open(filename1, "rb") as file1, open(filename2, "rb") as file2:
+        data1 = _map_file(file1)
+        data2 = _map_file(file2)
+        try:
+            offset = first_difference_offset(data1, data2, block_size)
+            if offset == IDENTICAL:
+                return "No differences\n"
+            line = _count_newlines(data1, offset)
+            next1 = next2 = data1.rfind(b"\n", 0, offset) + 1
+            while True:
+                line1, next1 = _line_at(data1, next1, encoding)
+                line2, next2 = _line_at(data2, next2, encoding)
+                if line1 != line2:
+                    break
+                if line1 is None:
+                    return "No differences\n"
+                # Only the line endings differ so far
+                line += 1
+        finally:
+            if isinstance(data1, mmap.mmap):
+                data1.close()
+            if isinstance(data2, mmap.mmap):
+                data2.close()
+    if line1 is None or line2 is None:
+        idx = 0
+        line1 = line1 or ""
+        line2 = line2 or ""
+    else:
+        idx = singleline_diff(line1, line2)
+    return "Line " + str(line) + ":\n" + singleline_diff_format(line1, line2, idx)
+
+# =============================================================================
+# filename1 = "hm1.txt"
+# filename2 = "hm2.txt"
+# print(file_diff_format_mmap(filename1, filename2))
+# =============================================================================
+
+
+def intern_lines(lines1, lines2):
+    """
+    Inputs:
+      lines1 - list of single line strings
+      lines2 - list of single line strings
+    Output:
+      Returns a tuple of two lists of integers, one per input list,
+      where equal lines are given equal integers.  Comparing the
+      integers is then equivalent to comparing the lines.
+    """
+    ids = {}
+    ids1 = [ids.setdefault(line, len(ids)) for line in lines1]
+    ids2 = [ids.setdefault(line, len(ids)) for line in lines2]
+    return ids1, ids2
+
+def _middle_snake(seq1, lo1, hi1, seq2, lo2, hi2, max_cost):
+    """
+    Inputs:
+      seq1     - list of integers
+      lo1, hi1 - bounds of the range of seq1 to compare
+      seq2     - list of integers
+      lo2, hi2 - bounds of the range of seq2 to compare
+      max_cost - largest edit distance to search up to
+    Output:
+      Returns a tuple (xpos, ypos) of offsets into the two ranges at
+      which a shortest edit script can be split in two, found by
+      running the Myers search forwards from the start and backwards
+      from the end until the two meet.  Both ranges must be non-empty.
+
+      Returns None if the edit distance between the ranges is more
+      than about 2 * max_cost.
+    """
+    len1 = hi1 - lo1
+    len2 = hi2 - lo2
+    max_d = min((len1 + len2 + 1) // 2, max_cost)
+    v_offset = max_d + 1
+    v_length = 2 * v_offset + 1
+    forward = [-1] * v_length
+    backward = [-1] * v_length
+    forward[v_offset + 1] = 0
+    backward[v_offset + 1] = 0
+    delta = len1 - len2
+    # With an odd delta the paths meet during a forward step
+    front = delta % 2 != 0
+    k1start = k1end = k2start = k2end = 0
+    for dist in range(max_d):
+        for diag in range(-dist + k1start, dist + 1 - k1end, 2):
+            pos = v_offset + diag
+            if diag == -dist or (diag != dist and forward[pos - 1] < forward[pos + 1]):
+                xpos = forward[pos + 1]
+            else:
+                xpos = forward[pos - 1] + 1
+            ypos = xpos - diag
+            while xpos < len1 and ypos < len2 and seq1[lo1 + xpos] == seq2[lo2 + ypos]:
+                xpos += 1
+                ypos += 1
+            forward[pos] = xpos
+            if xpos > len1:
+                k1end += 2
+            elif ypos > len2:
+                k1start += 2
+            elif front:
+                other = v_offset + delta - diag
+                if 0 <= other < v_length and backward[other] != -1:
+                    if xpos >= len1 - backward[other]:
+                        return xpos, ypos
+        for diag in range(-dist + k2start, dist + 1 - k2end, 2):
+            pos = v_offset + diag
+            if diag == -dist or (diag != dist and backward[pos - 1] < backward[pos + 1]):
+                xpos = backward[pos + 1]
+            else:
+                xpos = backward[pos - 1] + 1
+            ypos = xpos - diag
+            while (xpos < len1 and ypos < len2 and
+                   seq1[hi1 - 1 - xpos] == seq2[hi2 - 1 - ypos]):
+                xpos += 1
+                ypos += 1
+            backward[pos] = xpos
+            if xpos > len1:
+                k2end += 2
+            elif ypos > len2:
+                k2start += 2
+            elif not front:
+                other = v_offset + delta - diag
+                if 0 <= other < v_length and forward[other] != -1:
+                    xfront = forward[other]
+                    if xfront >= len1 - xpos:
+                        return xfront, xfront - (delta - diag)
+    return None
+
+def _unique_anchors(seq1, lo1, hi1, seq2, lo2, hi2):
+    """
+    Inputs:
+      seq1     - list of integers
+      lo1, hi1 - bounds of the range of seq1 to compare
+      seq2     - list of integers
+      lo2, hi2 - bounds of the range of seq2 to compare
+    Output:
+      Returns the longest increasing list of (index1, index2) pairs
+      of elements that occur exactly once in each range (the anchors
+      of a patience diff).
+    """
+    counts = {}
+    for idx in range(lo1, hi1):
+        counts[seq1[idx]] = counts.get(seq1[idx], 0) + 1
+    unique1 = {seq1[idx]: idx for idx in range(lo1, hi1) if counts[seq1[idx]] == 1}
+    counts2 = {}
+    for idx in range(lo2, hi2):
+        if seq2[idx] in unique1:
+            counts2[seq2[idx]] = counts2.get(seq2[idx], 0) + 1
+    pairs = sorted((unique1[seq2[idx]], idx) for idx in range(lo2, hi2)
+                   if counts2.get(seq2[idx]) == 1)
+    # Longest increasing subsequence of the second indices
+    tails = []
+    tail_pairs = []
+    previous = []
+    for num, (_, idx2) in enumerate(pairs):
+        pile = bisect.bisect_left(tails, idx2)
+        previous.append(tail_pairs[pile - 1] if pile else -1)
+        if pile == len(tails):
+            tails.append(idx2)
+            tail_pairs.append(num)
+        else:
+            tails[pile] = idx2
+            tail_pairs[pile] = num
+    anchors = []
+    num = tail_pairs[-1] if tail_pairs else -1
+    while num != -1:
+        anchors.append(pairs[num])
+        num = previous[num]
+    anchors.reverse()
+    return anchors
+
+def _diff_range(seq1, lo1, hi1, seq2, lo2, hi2, matches, max_cost, anchored=False):
+    """
+    Inputs:
+      seq1     - list of integers
+      lo1, hi1 - bounds of the range of seq1 to compare
+      seq2     - list of integers
+      lo2, hi2 - bounds of the range of seq2 to compare
+      matches  - list to which matching (index1, index2) pairs are added
+      max_cost - edit distance beyond which a region is not searched
+                 for a shortest edit script
+      anchored - True once the region lies between patience anchors
+    Output:
+      Returns None.  Appends to matches, in increasing order, a common
+      subsequence of the two ranges: the longest one (linear-space
+      Myers) for regions within max_cost, else one anchored on lines
+      that are unique in both regions, with the regions between
+      anchors that are still too costly reported as replaced.
+    """
+    while lo1 < hi1 and lo2 < hi2 and seq1[lo1] == seq2[lo2]:
+        matches.append((lo1, lo2))
+        lo1 += 1
+        lo2 += 1
+    suffix = 0
+    while (lo1 < hi1 - suffix and lo2 < hi2 - suffix and
+           seq1[hi1 - 1 - suffix] == seq2[hi2 - 1 - suffix]):
+        suffix += 1
+    hi1 -= suffix
+    hi2 -= suffix
+    if lo1 < hi1 and lo2 < hi2 and not set(seq1[lo1:hi1]).isdisjoint(seq2[lo2:hi2]):
+        split = _middle_snake(seq1, lo1, hi1, seq2, lo2, hi2, max_cost)
+        if split is not None and 0 < split[0] + split[1] < (hi1 - lo1) + (hi2 - lo2):
+            mid1 = lo1 + split[0]
+            mid2 = lo2 + split[1]
+            _diff_range(seq1, lo1, mid1, seq2, lo2, mid2, matches, max_cost, anchored)
+            _diff_range(seq1, mid1, hi1, seq2, mid2, hi2, matches, max_cost, anchored)
+        elif not anchored:
+            prev1 = lo1
+            prev2 = lo2
+            for (idx1, idx2) in _unique_anchors(seq1, lo1, hi1, seq2, lo2, hi2):
+                _diff_range(seq1, prev1, idx1, seq2, prev2, idx2, matches, max_cost, True)
+                matches.append((idx1, idx2))
+                prev1 = idx1 + 1
+                prev2 = idx2 + 1
+            _diff_range(seq1, prev1, hi1, seq2, prev2, hi2, matches, max_cost, True)
+    for num in range(suffix):
+        matches.append((hi1 + num, hi2 + num))
+
+def diff_hunks(lines1, lines2, max_cost=MAX_EDIT_COST):
+    """
+    Inputs:
+      lines1   - list of single line strings
+      lines2   - list of single line strings
+      max_cost - edit distance beyond which a region of the files is
+                 not searched for a minimal diff, see _diff_range
+    Output:
+      Returns a list of tuples (start1, end1, start2, end2), one per
+      differing region, meaning that lines1[start1:end1] must be
+      replaced by lines2[start2:end2].  The list is empty if the two
+      lists are the same.
+
+      The hunks are minimal unless some region differs by more than
+      about 2 * max_cost lines, which keeps time and memory near
+      linear in the number of lines even for completely different files.
+    """
+    ids1, ids2 = intern_lines(lines1, lines2)
+    matches = []
+    _diff_range(ids1, 0, len(ids1), ids2, 0, len(ids2), matches, max_cost)
+    hunks = []
+    pos1 = pos2 = 0
+    for (idx1, idx2) in matches + [(len(ids1), len(ids2))]:
+        if idx1 > pos1 or idx2 > pos2:
+            hunks.append((pos1, idx1, pos2, idx2))
+        pos1 = idx1 + 1
+        pos2 = idx2 + 1
+    return hunks
+
+def file_diff_format_all(filename1, filename2):
+    """
+    Inputs:
+      filename1 - name of first file
+      filename2 - name of second file
+    Output:
+      Returns a string reporting every differing hunk between the two
+      files.  Each hunk is shown as a "Line N:" header (with the line
+      number in the second file added when it differs) followed by
+      singleline_diff_format applied to the first line of the hunk in
+      each file.  Lines missing from a file are shown as empty.
+
+      If the files are identical, the function instead returns the
+      string "No differences\n".
+    """
+    list1 = get_file_lines(filename1)
+    list2 = get_file_lines(filename2)
+    hunks = diff_hunks(list1, list2)
+    if not hunks:
+        return "No differences\n"
+    result = []
+    for (start1, end1, start2, end2) in hunks:
+        line1 = list1[start1] if start1 < end1 else ""
+        line2 = list2[start2] if start2 < end2 else ""
+        idx = singleline_diff(line1, line2)
+        if idx == IDENTICAL:
+            idx = 0
+        header = "Line " + str(start1)
+        if start2 != start1:
+            header += " (line " + str(start2) + " in second file)"
+        result.append(header + ":\n" + singleline_diff_format(line1, line2, idx))
+    return "".join(result)
+
+# =============================================================================
+# filename1 = "hm1.txt"
+# filename2 = "hm2.txt"
+# print(file_diff_format_all(filename1, filename2))
+# =============================================================================
+
+def test_diff_hunks():
+    """
+    Check diff_hunks on small cases, with and without a cost cap,
+    and on large files where every line differs
+    """
+    assert diff_hunks([], []) == []
+    assert diff_hunks(["a", "b"], ["a", "b"]) == []
+    assert diff_hunks(["a"], []) == [(0, 1, 0, 0)]
+    assert diff_hunks([], ["a", "b"]) == [(0, 0, 0, 2)]
+    assert diff_hunks(["a", "b", "c"], ["a", "x", "c"]) == [(1, 2, 1, 2)]
+    assert diff_hunks(["a", "b", "c", "d"], ["b", "c", "d", "e"]) == [(0, 1, 0, 0), (4, 4, 3, 4)]
+    # Shortest edit script: 5 edits for the example of Myers' paper
+    assert diff_hunks(list("abcabba"), list("cbabac")) == [(0, 1, 0, 1), (2, 3, 2, 2),
+                                                          (5, 6, 4, 4), (7, 7, 5, 6)]
+    # Past the cost cap, lines unique to both sides still anchor the diff
+    lines1 = ["u1", "a", "b", "u2", "c", "d", "u3"]
+    lines2 = ["u1", "x", "y", "u2", "z", "w", "u3"]
+    assert diff_hunks(lines1, lines2, max_cost=1) == [(1, 3, 1, 3), (4, 6, 4, 6)]
+    # Every line different: one hunk, found without a quadratic search
+    lines1 = ["a" + str(num) for num in range(200000)]
+    lines2 = ["b" + str(num) for num in range(200000)]
+    assert diff_hunks(lines1, lines2) == [(0, 200000, 0, 200000)]
+    print("test_diff_hunks passed")
+
+#test_diff_hunks()
+
+def test_file_diff_format_all():
+    """
+    Check file_diff_format_all on temporary files
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        names = [os.path.join(tmpdir, name) for name in ("f1.txt", "f2.txt", "f3.txt")]
+        for name, text in zip(names, ["abc\nxyz\nend\n", "abc\nxYz\nend\nnew\n",
+                                      "abc\nxyz\nend\n"]):
+            with open(name, "w") as data:
+                data.write(text)
+        assert file_diff_format_all(names[0], names[2]) == "No differences\n"
+        assert file_diff_format_all(names[0], names[1]) == \
+            "Line 1:\nxyz\n=^\nxYz\n" + "Line 3:\n\n^\nnew\n"
+        assert file_diff_format_all(names[1], names[0]) == \
+            "Line 1:\nxYz\n=^\nxyz\n" + "Line 3:\nnew\n^\n\n"
+    print("test_file_diff_format_all passed")
+
+#test_file_diff_format_all()
+
+def test_file_diff_format_mmap():
+    """
+    Check file_diff_format_mmap against file_diff_format on temporary
+    files, with "\n" and "\r\n" line endings
+    """
+    cases = [(b"abc\nxyz\n", b"abc\nxYz\n"),
+             (b"a,b\r\nc,d\r\n", b"a,b\r\nc,e\r\n"),
+             (b"a,b\r\nc,d\r\n", b"a,b\nc,d\n"),
+             (b"a,b\r\nc,d\r\n", b"a,b\nc,d\nx\n"),
+             (b"a,b\r\nc,d", b"a,b\r\nc,d\r\n"),
+             (b"abc\n", b"abc\n\n"),
+             (b"", b"abc\r\n")]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        name1 = os.path.join(tmpdir, "f1.txt")
+        name2 = os.path.join(tmpdir, "f2.txt")
+        for data1, data2 in cases:
+            with open(name1, "wb") as file1, open(name2, "wb") as file2:
+                file1.write(data1)
+                file2.write(data2)
+            assert file_diff_format_mmap(name1, name2) == file_diff_format(name1, name2)
+        assert file_diff_format_mmap(name1, name2) == "Line 0:\n\n^\nabc\n"
+    print("test_file_diff_format_mmap passed")
+
+#test_file_diff_format_mmap()
+
+
+def file_digest(filename, buffer_size=STREAM_BUFFER_SIZE):
+    """
+    Inputs:
+      filename    - name of file to hash
+      buffer_size - number of bytes hashed at once
+    Output:
+      Returns the BLAKE2b digest of the contents of the file.
+    """
+    digest = hashlib.blake2b()
+    with open(filename, "rb") as data:
+        for chunk in iter(lambda: data.read(buffer_size), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+def relative_files(dirname):
+    """
+    Inputs:
+      dirname - name of a directory
+    Output:
+      Returns a set of the paths, relative to dirname and using "/" as
+      separator, of every file in the directory tree under dirname.
+    """
+    res = set()
+    for root, _, files in os.walk(dirname):
+        for name in files:
+            path = os.path.relpath(os.path.join(root, name), dirname)
+            res.add(path.replace(os.sep, "/"))
+    return res
+
+def _same_contents(filename1, filename2):
+    """
+    Inputs:
+      filename1 - name of first file
+      filename2 - name of second file
+    Output:
+      Returns True if the two files have byte-identical contents,
+      checking the sizes before hashing the contents.
+    """
+    if os.path.getsize(filename1) != os.path.getsize(filename2):
+        return False
+    return file_digest(filename1) == file_digest(filename2)
+
+def _diff_pair(paths):
+    """
+    Inputs:
+      paths - tuple of the names of the two files to compare
+    Output:
+      Returns file_diff_format_streaming for the two files.
+    """
+    return file_diff_format_streaming(paths[0], paths[1])
+
+def dir_diff_format(dirname1, dirname2, max_workers=None):
+    """
+    Inputs:
+      dirname1    - name of first directory
+      dirname2    - name of second directory
+      max_workers - number of worker processes, defaults to the CPU count
+    Output:
+      Returns a string reporting, in sorted path order, the files found
+      in only one of the two directory trees and, for every pair of
+      files with the same relative path and different contents, a
+      "File <path>:" header followed by the file_diff_format report.
+
+      Byte-identical files are skipped using a size check and then a
+      content hash; the remaining pairs are diffed in a process pool.
+
+      If the trees are identical, the function instead returns the
+      string "No differences\n".
+    """
+    files1 = relative_files(dirname1)
+    files2 = relative_files(dirname2)
+    reports = {}
+    for path in files1 - files2:
+        reports[path] = "Only in " + dirname1 + ": " + path + "\n"
+    for path in files2 - files1:
+        reports[path] = "Only in " + dirname2 + ": " + path + "\n"
+    pairs = []
+    for path in sorted(files1 & files2):
+        filename1 = os.path.join(dirname1, path)
+        filename2 = os.path.join(dirname2, path)
+        if not _same_contents(filename1, filename2):
+            pairs.append((path, (filename1, filename2)))
+    if pairs:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(_diff_pair, [names for _, names in pairs])
+            for (path, _), result in zip(pairs, results):
+                if result != "No differences\n":
+                    reports[path] = "File " + path + ":\n" + result
+    if not reports:
+        return "No differences\n"
+    return "".join(reports[path] for path in sorted(reports))
+
+# =============================================================================
+# print(dir_diff_format("expected", "produced"))
+# =============================================================================
@@ -3,7 +3,9 @@ Week 1 practice project solution for Python Data Visualization
 Load a county-level PNG map of the USA and draw it using matplotlib
 """
 
+import csv
 import matplotlib.pyplot as plt
+import map_tiles
 
 # Houston location
 
@@ -42,6 +44,30 @@ def draw_USA_map(map_name):
 
     plt.show()
 
+
+def draw_USA_map_tiled(map_name, centers_name="USA_Counties_with_FIPS_and_centers.csv"):
+    """
+    Given the name of a PNG map of the USA and of a CSV file of county centers
+    (FIPS code, x, y in SVG coordinates), draw the map from its cached tile
+    pyramid with every county center as a scatter point
+    """
+    tiled_map = map_tiles.TiledMap(map_name)
+    
+    # Read county centers and rescale them to the map size
+    with open(centers_name, newline='') as centers_file:
+        centers = [(float(row[1]), float(row[2])) for row in csv.reader(centers_file)]
+    xvals, yvals = map_tiles.svg_to_pixels([center[0] for center in centers],
+                                           [center[1] for center in centers],
+                                           tiled_map.width, tiled_map.height)
+    
+    # Tiles are loaded as the view is panned and zoomed
+    axes = plt.gca()
+    tiled_map.draw(axes)
+    map_tiles.draw_points(axes, xvals, yvals, size=4, color="Red")
+    
+    plt.show()
+
 draw_USA_map("USA_Counties_555x352.png")
 #draw_USA_map("USA_Counties_1000x634.png")   
+#draw_USA_map_tiled("USA_Counties_1000x634.png")
 
@@ -19,22 +19,16 @@ import csv
 # Parse the XMLin USA SVG file extract county attributes
 # Derive from example code - https://stackoverflow.com/questions/15857818/python-svg-parser
 
-from xml.dom import minidom
+import county_centers
 
 def get_county_attributes(svg_file_name):
     """
     Given SVG file associate with string svg_file_name, extract county attributes from associated XML
     Return a list of tuples consisting of FIPS codes (strings) and county boundaries (strings)
+    Use county_centers.iter_county_attributes directly to process counties while the file is parsed
     """
     
-    svg_doc = minidom.parse(svg_file_name)
-    county_attribute_list = []
-    for path in svg_doc.getElementsByTagName('path'):
-        FIPS_code = path.getAttribute('id')
-        county_boundary_data = path.getAttribute('d')
-        county_attribute_list.append((FIPS_code, county_boundary_data))
-    svg_doc.unlink()
-    return county_attribute_list
+    return list(county_centers.iter_county_attributes(svg_file_name))
                                           
 
 def test_get_attributes(svg_file_name):
@@ -67,21 +61,10 @@ def get_boundary_coordinates(boundary_data):
     Given the country boundary data as a string,
     Return the county boundary as a list of coordinates
     Ignores 'M', 'L, 'z'
+    Raises ValueError on malformed boundary data instead of dropping points
     """
-    boundary_data = boundary_data.replace('z', '')
-    boundary_data = boundary_data.replace('M', 'L')
-    boundary_list = boundary_data.split('L')[1:]
-    
-    boundary_coordinates = []
-    for entry in boundary_list:
-        temp = entry.split(',')
-        if len(temp) == 2:
-            (xcoord, ycoord) = temp
-        else:
-            print(len(temp))
-            print(temp)
-        boundary_coordinates.append((float(xcoord), float(ycoord)))    
-    return boundary_coordinates
+    coords, _ = county_centers.parse_path_data(boundary_data)
+    return list(zip(coords[0::2], coords[1::2]))
 
 
 # Provided code to estimate a county center from a list of coordinates on county boundary
@@ -133,30 +116,24 @@ def test_boundary_code():
                                             
 # Put it all together to read county attributes from SVG files, compute county centers, write FIPS codes and county centers to CSV file
 
-def process_county_attributes(svg_file_name, csv_file_name):
+def process_county_attributes(svg_file_name, csv_file_name, resume=False):
     """
     Given SVG file name (as string), extract county attributes (FIPS code and county boundaries)
     Then compute county centers and write a CSV file with columns corresponding to FIPS code, x-coord of centers, y-coord of centers 
+    Runs as a pipeline: boundaries are streamed from the SVG, centered in batches on a process pool
+    and written in order; with resume=True, counties already in the CSV file are skipped
     """
 
-    # Extract county attibutes from SVG file
-    county_attribute_list = get_county_attributes(svg_file_name)
-    print("Processed", len(county_attribute_list), "entries")
-    
-    # Ouput CSV file
-    with open(csv_file_name, 'w', newline='') as csv_file:
-        csv_writer = csv.writer(csv_file, delimiter=',', quoting=csv.QUOTE_MINIMAL)
-        for (fips, boundary) in county_attribute_list:
-            boundary_coordinates = get_boundary_coordinates(boundary)
-            center = compute_county_center(boundary_coordinates)
-            csv_writer.writerow([fips, center[0], center[1]])
+    entries = county_centers.process_county_centers(svg_file_name, csv_file_name, resume=resume)
+    print("Processed", entries, "entries")
     print("Wrote csv file", csv_file_name)
     
     
 # Output CSV file should have 3143 rows
     
-#process_county_attributes("USA_Counties_with_FIPS_and_names.svg", "USA_Counties_with_FIPS_and_centers.csv")                                      
-process_county_attributes("USA_Counties_2014.svg", "USA_Counties_with_FIPS_and_centers_1.csv")                                      
+if __name__ == "__main__":
+    #process_county_attributes("USA_Counties_with_FIPS_and_names.svg", "USA_Counties_with_FIPS_and_centers.csv")                                      
+    process_county_attributes("USA_Counties_2014.svg", "USA_Counties_with_FIPS_and_centers_1.csv")                                      
 
 
 def test_same_file(file1, file2):
@@ -172,7 +149,8 @@ def test_same_file(file1, file2):
             list1.append(row)
     print(list1 == list2)
 
-test_same_file("USA_Counties_with_FIPS_and_centers_1.csv", "USA_Counties_with_FIPS_and_centers.csv")
+if __name__ == "__main__":
+    test_same_file("USA_Counties_with_FIPS_and_centers_1.csv", "USA_Counties_with_FIPS_and_centers.csv")
 
                     
 
@@ -5,6 +5,7 @@ Analyze both data sources for anamolous FIPS codes
 """
 
 import csv
+import csv_join
 
 
 
@@ -100,16 +101,15 @@ def merge_csv_files(cancer_csv_file, center_csv_file, joined_csv_file):
     center_table = read_csv_file(center_csv_file)
     print("Read center table of length", len(center_table))
 
-    center_dict = make_dict(center_table, CENTER_FIPS_COL)
+    # Hash index on each table's FIPS codes, built once
+    center_index = csv_join.build_index(center_table, CENTER_FIPS_COL)
+    risk_index = csv_join.build_index(risk_table, CANCER_RISK_FIPS_COL)
     
     # Compute joined table, print warning about cancer-risk FIPS codes that are not in USA map
-    joined_table =[]
-    for row in risk_table:
-        FIPS_code = row[2]
-        if FIPS_code in center_dict:
-            joined_table.append(row + center_dict[FIPS_code])
-        else:
-            print("Row", row, "in cancer risk table not present in USA map")
+    joined_table = list(csv_join.inner_join(risk_table, center_index,
+                                            CANCER_RISK_FIPS_COL, CENTER_FIPS_COL))
+    for row in csv_join.anti_join(risk_table, center_index, CANCER_RISK_FIPS_COL):
+        print("Row", row, "in cancer risk table not present in USA map")
 
     # Write joined table
     print("Wrote joined table of length", len(joined_table))
@@ -117,14 +117,61 @@ def merge_csv_files(cancer_csv_file, center_csv_file, joined_csv_file):
     
     # Print warning about FIPS codes in USA map that are missing from cancer risk data
     print()
-    risk_codes =[risk_table[idx][2] for idx in range(len(risk_table))]
-    for center_code in center_dict:
-        if center_code not in risk_codes:
-            print("Code", center_code, "in center table not present in cancer risk table")
+    for row in csv_join.anti_join(center_index.values(), risk_index, CENTER_FIPS_COL):
+        print("Code", row[CENTER_FIPS_COL], "in center table not present in cancer risk table")
+
+
+
+def merge_sorted_csv_files(cancer_csv_file, center_csv_file, joined_csv_file,
+                           chunk_rows=csv_join.SORT_CHUNK_ROWS, presorted=False):
+    """
+    Join the two specified CSV files by shared FIPS codes with a sort-merge join
+    and write the resulting joined table, in the same row order as merge_csv_files,
+    as the specified file.  Inputs larger than chunk_rows are sorted on disk,
+    so memory use stays bounded; pass presorted=True if both files are already
+    sorted by FIPS code
+    """
+    joined_length = csv_join.sort_merge_join_csv_files(cancer_csv_file, center_csv_file,
+                                                       joined_csv_file, CANCER_RISK_FIPS_COL,
+                                                       CENTER_FIPS_COL, chunk_rows, presorted)
+    print("Wrote joined table of length", joined_length)
+
+
+
+def merge_csv_files_incremental(cancer_csv_file, center_csv_file, joined_csv_file):
+    """
+    Join the two specified CSV files like merge_csv_files, but only re-join the
+    FIPS codes that were added, removed or changed in either file since the last
+    incremental run (tracked in a state file next to the joined file)
+    Print the changed codes and the anomalous FIPS codes that appeared or disappeared
+    """
+    report = csv_join.incremental_join_csv_files(cancer_csv_file, center_csv_file,
+                                                 joined_csv_file, CANCER_RISK_FIPS_COL,
+                                                 CENTER_FIPS_COL)
+    if report["full_rebuild"]:
+        print("No previous state, rebuilt joined table")
+    for side, name in (("probe", "risk"), ("build", "center")):
+        for change in ("added", "removed", "changed"):
+            codes = report[side + "_" + change]
+            if codes and not report["full_rebuild"]:
+                print(len(codes), "codes", change, "in", name, "table:", codes)
+    print("Re-joined", report["rejoined"], "rows")
+    if report["written"] is None:
+        print("Joined table is up to date")
+    else:
+        print("Wrote joined table of length", report["written"])
+    for side, name, other in (("probe", "cancer risk", "USA map"),
+                              ("build", "center", "cancer risk")):
+        for code in report["anomalies_added"][side]:
+            print("Code", code, "in", name, "table now not present in", other, "table")
+        for code in report["anomalies_removed"][side]:
+            print("Code", code, "in", name, "table now present in", other, "table")
 
 
 
 merge_csv_files("cancer_risk_trimmed_solution.csv", "USA_Counties_with_FIPS_and_centers.csv", "cancer_risk_joined.csv")
+#merge_sorted_csv_files("cancer_risk_trimmed_solution.csv", "USA_Counties_with_FIPS_and_centers.csv", "cancer_risk_joined.csv")
+#merge_csv_files_incremental("cancer_risk_trimmed_solution.csv", "USA_Counties_with_FIPS_and_centers.csv", "cancer_risk_joined.csv")
 
 
 
@@ -0,0 +1,323 @@
+"""
+Building blocks for computing county centers from an SVG map of the USA.
+
+The week 2 practice project loads the whole SVG document with minidom
+just to read the id and d attributes of every path.  The functions here
+stream the county boundaries out of the SVG instead, so that memory use
+stays flat for large county and census tract maps.
+
+Centers are computed for every county at once with NumPy, from the
+county polygons packed into one flat coordinate array plus an offsets
+array marking where each polygon (or ring) starts.
+"""
+
+import csv
+import os
+import re
+import xml.etree.ElementTree as ET
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+SVG_NAMESPACE = "{http://www.w3.org/2000/svg}"
+
+# A path command letter or a number, in the SVG path data grammar; any other
+# character that is not a separator is caught as unsupported
+PATH_TOKEN = re.compile(r"(?P<command>[MmLlHhVvZz])"
+                        r"|(?P<number>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)"
+                        r"|(?P<other>[^\s,])")
+
+
+def iter_county_attributes(svg_file_name):
+    """
+    Given SVG file associate with string svg_file_name, yield tuples of
+    FIPS codes (strings) and county boundaries (strings) for every path
+    element, in document order, while the file is being parsed.
+    Elements are discarded as soon as they have been handled.
+    """
+    path_tags = ("path", SVG_NAMESPACE + "path")
+    # Open ancestors of the current element, so that handled elements can be
+    # detached from their parent at any nesting depth (paths inside <g> groups)
+    parents = []
+    for event, elem in ET.iterparse(svg_file_name, events=("start", "end")):
+        if event == "start":
+            parents.append(elem)
+            continue
+        parents.pop()
+        if elem.tag in path_tags:
+            yield (elem.get("id", ""), elem.get("d", ""))
+        # Free the element's data, then detach it from the tree
+        elem.clear()
+        if parents:
+            parents[-1].remove(elem)
+
+
+
+def parse_path_data(boundary_data):
+    """
+    Given SVG path data as a string using the M/L/H/V/Z commands (absolute or relative),
+    Return a tuple of an array('d') of interleaved x, y coordinates and an array('q')
+    of ring offsets, so that ring i is made of points ring_offsets[i] up to
+    ring_offsets[i + 1].  A new ring starts at every moveto, and at the first line
+    drawn after a closepath (from the first point of the closed ring).  Closepath
+    does not repeat the first point of a ring.
+    Raises ValueError on malformed or unsupported path data.
+    """
+    coords = array("d")
+    ring_offsets = array("q", [0])
+    command = None
+    xpos = ypos = 0.0
+    start_x = start_y = 0.0
+    pending = None
+    ring_open = False
+    for match in PATH_TOKEN.finditer(boundary_data):
+        token = match.group()
+        if match.lastgroup == "other":
+            raise ValueError("unsupported command or character in path data: " + repr(token))
+        if match.lastgroup == "command":
+            if pending is not None:
+                raise ValueError("odd number of coordinates in path data")
+            command = token
+            if command in "Zz":
+                xpos, ypos = start_x, start_y
+                ring_open = False
+            continue
+        if command is None or command in "Zz":
+            raise ValueError("coordinate without a drawing command in path data")
+        value = float(token)
+        relative = command.islower()
+        if command in "Hh":
+            xpos = xpos + value if relative else value
+        elif command in "Vv":
+            ypos = ypos + value if relative else value
+        elif pending is None:
+            pending = value
+            continue
+        else:
+            xpos = xpos + pending if relative else pending
+            ypos = ypos + value if relative else value
+            pending = None
+        if command in "Mm" or not ring_open:
+            if len(coords) // 2 > ring_offsets[-1]:
+                ring_offsets.append(len(coords) // 2)
+            if command in "Mm":
+                start_x, start_y = xpos, ypos
+                # Further coordinate pairs after a moveto are linetos
+                command = "l" if relative else "L"
+            else:
+                # Drawing after a closepath starts from the closed ring's first point
+                coords.append(start_x)
+                coords.append(start_y)
+            ring_open = True
+        coords.append(xpos)
+        coords.append(ypos)
+    if pending is not None:
+        raise ValueError("odd number of coordinates in path data")
+    if len(coords) // 2 > ring_offsets[-1]:
+        ring_offsets.append(len(coords) // 2)
+    return coords, ring_offsets
+
+
+def parse_boundaries(boundaries):
+    """
+    Given an iterable of SVG path data strings, one per county,
+    Return a tuple (coords, ring_offsets, polygon_offsets) of NumPy arrays in the
+    layout produced by pack_rings, ready for perimeter_centroids (using
+    ring_offsets[polygon_offsets] as polygon offsets) or area_centroids
+    """
+    coords = array("d")
+    ring_offsets = array("q", [0])
+    polygon_offsets = array("q", [0])
+    for boundary_data in boundaries:
+        path_coords, path_rings = parse_path_data(boundary_data)
+        base = len(coords) // 2
+        coords.extend(path_coords)
+        ring_offsets.extend(base + offset for offset in path_rings[1:])
+        polygon_offsets.append(len(ring_offsets) - 1)
+    return (np.frombuffer(coords, dtype=np.float64).reshape(-1, 2),
+            np.frombuffer(ring_offsets, dtype=np.int64),
+            np.frombuffer(polygon_offsets, dtype=np.int64))
+
+def pack_polygons(polygons):
+    """
+    Given a list of polygons, each a list of coordinates (tuples of two floats),
+    Return a tuple of a float64 array of shape (total points, 2) holding all
+    coordinates and an int64 offsets array of length len(polygons) + 1 such that
+    polygon i is coords[offsets[i]:offsets[i + 1]]
+    """
+    lengths = [len(polygon) for polygon in polygons]
+    offsets = np.zeros(len(polygons) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    coords = np.empty((offsets[-1], 2), dtype=np.float64)
+    for idx, polygon in enumerate(polygons):
+        if polygon:
+            coords[offsets[idx]:offsets[idx + 1]] = polygon
+    return coords, offsets
+
+
+def pack_rings(polygons):
+    """
+    Given a list of polygons, each a list of rings that are lists of coordinates,
+    Return a tuple (coords, ring_offsets, polygon_offsets) where ring j is
+    coords[ring_offsets[j]:ring_offsets[j + 1]] and polygon i consists of rings
+    polygon_offsets[i] up to polygon_offsets[i + 1]
+    """
+    rings = [ring for polygon in polygons for ring in polygon]
+    coords, ring_offsets = pack_polygons(rings)
+    polygon_offsets = np.zeros(len(polygons) + 1, dtype=np.int64)
+    np.cumsum([len(polygon) for polygon in polygons], out=polygon_offsets[1:])
+    return coords, ring_offsets, polygon_offsets
+
+
+def _segment_ids(offsets):
+    """
+    Given an offsets array, return an array giving for each packed point
+    the index of the segment (polygon or ring) it belongs to
+    """
+    return np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+
+def perimeter_centroids(coords, offsets):
+    """
+    Given packed coordinates and polygon offsets (see pack_polygons),
+    Return a float64 array of shape (number of polygons, 2) with the
+    perimeter-weighted center of every polygon, the same estimate as
+    compute_county_center.  Consecutive points of a polygon are joined by
+    an edge, including the jumps between rings.  Polygons with zero
+    perimeter get NaN centers.
+    """
+    num_polygons = len(offsets) - 1
+    polygon_ids = _segment_ids(offsets)
+    # Edge i joins point i to point i + 1 when both are in the same polygon
+    same = polygon_ids[:-1] == polygon_ids[1:]
+    starts = coords[:-1][same]
+    ends = coords[1:][same]
+    edge_ids = polygon_ids[:-1][same]
+    deltas = ends - starts
+    # Same operations as dist(), so results match compute_county_center exactly
+    lengths = np.sqrt(deltas[:, 0] ** 2 + deltas[:, 1] ** 2)
+    weighted = 0.5 * (starts + ends) * lengths[:, np.newaxis]
+    perimeter = np.bincount(edge_ids, lengths, num_polygons)
+    centers = np.empty((num_polygons, 2), dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        centers[:, 0] = np.bincount(edge_ids, weighted[:, 0], num_polygons) / perimeter
+        centers[:, 1] = np.bincount(edge_ids, weighted[:, 1], num_polygons) / perimeter
+    centers[perimeter == 0] = np.nan
+    return centers
+
+
+def area_centroids(coords, ring_offsets, polygon_offsets):
+    """
+    Given packed coordinates with ring and polygon offsets (see pack_rings),
+    Return a float64 array of shape (number of polygons, 2) with the true area
+    centroid of every polygon, using the shoelace formula on each ring.  Each
+    ring is closed implicitly.  Rings of a polygon are combined by signed area,
+    so separate parts (islands) add up and oppositely oriented holes subtract.
+    Polygons with zero area fall back to their perimeter-weighted center.
+    """
+    num_polygons = len(polygon_offsets) - 1
+    ring_ids = _segment_ids(ring_offsets)
+    point_polygon_ids = _segment_ids(polygon_offsets)[ring_ids]
+    # Index of the next point in the same ring, wrapping to the ring start
+    next_idx = np.arange(1, len(coords) + 1)
+    ring_ends = ring_offsets[1:][np.diff(ring_offsets) > 0] - 1
+    next_idx[ring_ends] = ring_offsets[:-1][np.diff(ring_offsets) > 0]
+    xs, ys = coords[:, 0], coords[:, 1]
+    next_xs, next_ys = xs[next_idx], ys[next_idx]
+    cross = xs * next_ys - next_xs * ys
+    area2 = np.bincount(point_polygon_ids, cross, num_polygons)
+    centers = np.empty((num_polygons, 2), dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        centers[:, 0] = np.bincount(point_polygon_ids, (xs + next_xs) * cross,
+                                    num_polygons) / (3 * area2)
+        centers[:, 1] = np.bincount(point_polygon_ids, (ys + next_ys) * cross,
+                                    num_polygons) / (3 * area2)
+    degenerate = np.nonzero(area2 == 0)[0]
+    if len(degenerate):
+        point_offsets = ring_offsets[polygon_offsets]
+        fallback = perimeter_centroids(coords, point_offsets)
+        centers[degenerate] = fallback[degenerate]
+    return centers
+
+
+def compute_batch_centers(county_attribute_list, method="perimeter"):
+    """
+    Given a list of tuples of FIPS codes and county boundaries (strings),
+    Return a list of rows [FIPS code, x-coord of center, y-coord of center]
+    computed with perimeter_centroids (method "perimeter", the estimate used by
+    compute_county_center) or area_centroids (method "area")
+    """
+    coords, ring_offsets, polygon_offsets = parse_boundaries(
+        boundary for (_, boundary) in county_attribute_list)
+    if method == "perimeter":
+        centers = perimeter_centroids(coords, ring_offsets[polygon_offsets])
+    elif method == "area":
+        centers = area_centroids(coords, ring_offsets, polygon_offsets)
+    else:
+        raise ValueError("unknown center method: " + method)
+    return [[fips, xcoord, ycoord] for ((fips, _), (xcoord, ycoord))
+            in zip(county_attribute_list, centers.tolist())]
+
+
+def read_done_fips(csv_file_name):
+    """
+    Given the name of a county centers CSV file,
+    Return the set of FIPS codes already written to it (empty if there is no file)
+    """
+    if not os.path.exists(csv_file_name):
+        return set()
+    with open(csv_file_name, newline='') as csv_file:
+        return {row[0] for row in csv.reader(csv_file) if len(row) == 3}
+
+
+def _batches(county_attributes, batch_size, skip_fips):
+    """
+    Given an iterable of FIPS codes and county boundaries, a batch size and a
+    set of FIPS codes to skip, yield lists of at most batch_size tuples
+    """
+    batch = []
+    for (fips, boundary) in county_attributes:
+        if fips in skip_fips:
+            continue
+        batch.append((fips, boundary))
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def process_county_centers(svg_file_name, csv_file_name, batch_size=256, max_workers=None,
+                           max_pending=None, resume=False, method="perimeter"):
+    """
+    Given SVG file name (as string), stream county attributes from the SVG, compute
+    county centers in batches on a process pool and write a CSV file with columns
+    corresponding to FIPS code, x-coord of centers, y-coord of centers.
+    Rows are written in SVG order; at most max_pending batches (default twice the
+    number of workers) are in flight or waiting to be written at any time.
+    If resume is True, FIPS codes already present in csv_file_name are skipped and
+    new rows are appended to it.
+    Return the number of rows written
+    """
+    skip_fips = read_done_fips(csv_file_name) if resume else set()
+    mode = 'a' if resume else 'w'
+    written = 0
+    if max_pending is None:
+        max_pending = 2 * (max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor, \
+         open(csv_file_name, mode, newline='') as csv_file:
+        csv_writer = csv.writer(csv_file, delimiter=',', quoting=csv.QUOTE_MINIMAL)
+        pending = deque()
+        batches = _batches(iter_county_attributes(svg_file_name), batch_size, skip_fips)
+        for batch in batches:
+            pending.append(executor.submit(compute_batch_centers, batch, method))
+            while len(pending) >= max_pending:
+                rows = pending.popleft().result()
+                csv_writer.writerows(rows)
+                written += len(rows)
+        while pending:
+            rows = pending.popleft().result()
+            csv_writer.writerows(rows)
+            written += len(rows)
+    return written
@@ -0,0 +1,372 @@
+"""
+Hash joins for CSV tables stored as nested lists (or streamed row by row)
+
+The build side of a join is indexed once in a dictionary keyed on the join
+column, and the probe side is streamed through the index, so each join is
+linear in the size of both tables.  Probe rows may come from any iterable,
+for instance iter_csv_rows, so the probe table never has to be held in memory.
+
+For inputs that are sorted on the join key (or sorted on disk with
+external_sort), merge_join joins in constant memory instead.
+
+incremental_join_csv_files keeps per-key fingerprints of its inputs next
+to the joined file, so later runs only re-join the keys that changed.
+"""
+
+import csv
+import hashlib
+import heapq
+import json
+import os
+import tempfile
+from itertools import islice
+import file_stamps
+
+# Number of rows sorted in memory at a time by external_sort
+SORT_CHUNK_ROWS = 100000
+
+
+def iter_csv_rows(file_name):
+    """
+    Given the name of a comma-separated CSV file, yield its rows as lists of strings
+    """
+    with open(file_name, newline='') as csv_file:
+        csv_reader = csv.reader(csv_file, delimiter=',')
+        for row in csv_reader:
+            yield row
+
+
+def write_csv_rows(rows, file_name):
+    """
+    Write every row of the iterable rows into a comma-separated CSV file
+    with the name file_name, one row at a time
+    Return the number of rows written
+    """
+    count = 0
+    with open(file_name, 'w', newline='') as csv_file:
+        csv_writer = csv.writer(csv_file, delimiter=',', quoting=csv.QUOTE_MINIMAL)
+        for row in rows:
+            csv_writer.writerow(row)
+            count += 1
+    return count
+
+
+def build_index(table, key_col):
+    """
+    Given a 2D table (any iterable of rows) and a column index key_col,
+    return a dictionary mapping each entry of the key column to its row.
+    When a key repeats, the last row wins (as in make_dict) while the key
+    keeps the position of its first occurrence
+    """
+    index = {}
+    for row in table:
+        index[row[key_col]] = row
+    return index
+
+
+def _without_key(row, key_col):
+    """
+    Return a new list with the entries of row other than the one at key_col
+    """
+    return row[:key_col] + row[key_col + 1:]
+
+
+def inner_join(probe_rows, index, probe_key_col, build_key_col):
+    """
+    Given an iterable of probe rows, an index built with build_index and the
+    key column of each side, yield the probe row followed by the remaining
+    entries of the matching indexed row, for every probe row that has a match
+    """
+    for row in probe_rows:
+        match = index.get(row[probe_key_col])
+        if match is not None:
+            yield row + _without_key(match, build_key_col)
+
+
+def left_join(probe_rows, index, probe_key_col, build_key_col, fill_width, fill_value=""):
+    """
+    Like inner_join, but probe rows without a match are also yielded,
+    padded with fill_width copies of fill_value in place of the indexed entries
+    """
+    padding = [fill_value] * fill_width
+    for row in probe_rows:
+        match = index.get(row[probe_key_col])
+        if match is None:
+            yield row + padding
+        else:
+            yield row + _without_key(match, build_key_col)
+
+
+def anti_join(probe_rows, keys, probe_key_col):
+    """
+    Given an iterable of probe rows, a container of keys (an index, set or
+    dictionary) and the probe key column, yield the probe rows whose key is
+    not in keys
+    """
+    for row in probe_rows:
+        if row[probe_key_col] not in keys:
+            yield row
+
+
+def join_csv_files(probe_csv_file, build_csv_file, joined_csv_file,
+                   probe_key_col, build_key_col, how="inner"):
+    """
+    Join two comma-separated CSV files on the given key columns and write the result
+    as joined_csv_file.  Only the build file is held in memory (as an index);
+    the probe file is streamed straight through to the output.  how is "inner",
+    "left" (unmatched probe rows padded with empty strings) or "anti" (only the
+    unmatched probe rows)
+    Return the number of rows written
+    """
+    index = build_index(iter_csv_rows(build_csv_file), build_key_col)
+    probe_rows = iter_csv_rows(probe_csv_file)
+    if how == "inner":
+        rows = inner_join(probe_rows, index, probe_key_col, build_key_col)
+    elif how == "left":
+        width = max((len(row) - 1 for row in index.values()), default=0)
+        rows = left_join(probe_rows, index, probe_key_col, build_key_col, width)
+    elif how == "anti":
+        rows = anti_join(probe_rows, index, probe_key_col)
+    else:
+        raise ValueError("unknown join type: " + how)
+    return write_csv_rows(rows, joined_csv_file)
+
+
+def external_sort(rows, key, chunk_rows=SORT_CHUNK_ROWS, temp_dir=None, max_merge_files=None):
+    """
+    Given an iterable of rows (lists of strings) and a key function, yield the
+    rows sorted by key.  Rows are sorted in memory chunk_rows at a time; if there
+    is more than one chunk, each sorted chunk is spilled to a temporary CSV file
+    and the files are merged, so memory use is bounded by chunk_rows.  If
+    max_merge_files is given, at most that many files are merged at once, with
+    extra merge passes through intermediate files when there are more.
+    The sort is stable
+    """
+    rows = iter(rows)
+    chunk = sorted(islice(rows, chunk_rows), key=key)
+    if len(chunk) < chunk_rows:
+        yield from chunk
+        return
+    with tempfile.TemporaryDirectory(dir=temp_dir) as spill_dir:
+        spill_files = []
+        while chunk:
+            spill_name = os.path.join(spill_dir, str(len(spill_files)) + ".csv")
+            write_csv_rows(chunk, spill_name)
+            spill_files.append(spill_name)
+            chunk = sorted(islice(rows, chunk_rows), key=key)
+        fan_in = max(2, max_merge_files or len(spill_files))
+        merged = 0
+        while len(spill_files) > fan_in:
+            # Merge consecutive runs, so equal keys keep their input order
+            next_files = []
+            for start in range(0, len(spill_files), fan_in):
+                group = spill_files[start:start + fan_in]
+                merge_name = os.path.join(spill_dir, "merge" + str(merged) + ".csv")
+                merged += 1
+                write_csv_rows(heapq.merge(*[iter_csv_rows(name) for name in group], key=key),
+                               merge_name)
+                for name in group:
+                    os.remove(name)
+                next_files.append(merge_name)
+            spill_files = next_files
+        yield from heapq.merge(*[iter_csv_rows(name) for name in spill_files], key=key)
+
+
+def merge_join(probe_rows, build_rows, probe_key_col, build_key_col):
+    """
+    Given probe rows and build rows that are both sorted on their key columns,
+    yield the same rows as inner_join would with an index built on build_rows:
+    each probe row followed by the remaining entries of the last build row with
+    the same key.  Only one build row is held in memory at a time
+    """
+    build_rows = iter(build_rows)
+    build_row = next(build_rows, None)
+    match_key = None
+    match = None
+    for row in probe_rows:
+        key = row[probe_key_col]
+        if match_key != key:
+            # Skip smaller build keys, then keep the last build row equal to key
+            while build_row is not None and build_row[build_key_col] < key:
+                build_row = next(build_rows, None)
+            match = None
+            while build_row is not None and build_row[build_key_col] == key:
+                match = build_row
+                build_row = next(build_rows, None)
+            match_key = key
+        if match is not None:
+            yield row + _without_key(match, build_key_col)
+
+
+def sort_merge_join_csv_files(probe_csv_file, build_csv_file, joined_csv_file,
+                              probe_key_col, build_key_col, chunk_rows=SORT_CHUNK_ROWS,
+                              presorted=False, keep_probe_order=True):
+    """
+    Inner join two comma-separated CSV files with a sort-merge join and write the
+    result as joined_csv_file, using memory bounded by chunk_rows.  Unless
+    presorted is True, both files are first sorted on their keys with
+    external_sort.  If keep_probe_order is True, the joined rows are written in
+    the order of the probe file (as join_csv_files does); otherwise in key order
+    Return the number of rows written
+    """
+    probe_rows = iter_csv_rows(probe_csv_file)
+    build_rows = iter_csv_rows(build_csv_file)
+    if keep_probe_order:
+        # Tag probe rows with their position so the output can be restored to it
+        probe_rows = ([str(position)] + row for position, row in enumerate(probe_rows))
+        probe_key_col += 1
+    if not presorted:
+        probe_rows = external_sort(probe_rows, lambda row: row[probe_key_col], chunk_rows)
+        build_rows = external_sort(build_rows, lambda row: row[build_key_col], chunk_rows)
+    rows = merge_join(probe_rows, build_rows, probe_key_col, build_key_col)
+    if keep_probe_order:
+        rows = (row[1:] for row in external_sort(rows, lambda row: int(row[0]), chunk_rows))
+    return write_csv_rows(rows, joined_csv_file)
+
+
+STATE_SUFFIX = ".state.json"
+
+
+def row_fingerprint(row):
+    """
+    Return a short hex digest identifying the contents of row
+    """
+    return hashlib.blake2b("\x1f".join(row).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _changed_keys(old, new):
+    """
+    Given two dictionaries mapping keys to fingerprints, return a tuple of the
+    sets of added, removed and changed keys
+    """
+    added = new.keys() - old.keys()
+    removed = old.keys() - new.keys()
+    changed = {key for key in new.keys() & old.keys() if new[key] != old[key]}
+    return added, removed, changed
+
+
+def _load_state(state_file):
+    """
+    Return the saved join state in state_file, or None if there is none
+    """
+    try:
+        with open(state_file) as state:
+            return json.load(state)
+    except (OSError, ValueError):
+        return None
+
+
+def _same_order(old_order, new_order, keys):
+    """
+    Return True if the keys in the set keys appear in the same relative order
+    in the lists old_order and new_order
+    """
+    return ([key for key in old_order if key in keys] ==
+            [key for key in new_order if key in keys])
+
+
+def incremental_join_csv_files(probe_csv_file, build_csv_file, joined_csv_file,
+                               probe_key_col, build_key_col, state_file=None):
+    """
+    Inner join two comma-separated CSV files like join_csv_files, reusing the
+    previous joined_csv_file where possible.  A state file (by default the
+    joined file name plus STATE_SUFFIX) keeps the modification time and size of
+    the three files and a fingerprint of every input row by key.  If none of
+    the files was touched since the last run, nothing is read.  Otherwise only
+    probe rows whose own row or matching build row was added, removed or
+    changed are re-joined; all other joined rows are copied from the previous
+    output, which is read in step with the probe file, and nothing is written
+    if no key changed.
+    Probe keys must be unique; otherwise the join is always rebuilt in full.
+    Return a dictionary describing the run: the added, removed and changed
+    keys of each input, the number of rows re-joined and written, and the
+    anomalies (probe keys missing from the build file and build keys missing
+    from the probe file) that appeared or disappeared since the last run
+    """
+    if state_file is None:
+        state_file = joined_csv_file + STATE_SUFFIX
+    stamps = {"probe": file_stamps.file_stamp(probe_csv_file),
+              "build": file_stamps.file_stamp(build_csv_file),
+              "joined": file_stamps.file_stamp(joined_csv_file)}
+    state = _load_state(state_file)
+    if state is not None and stamps["joined"] is not None and state.get("stamps") == stamps:
+        return {"full_rebuild": False,
+                "probe_added": [], "probe_removed": [], "probe_changed": [],
+                "build_added": [], "build_removed": [], "build_changed": [],
+                "rejoined": 0, "written": None,
+                "anomalies_added": {"probe": [], "build": []},
+                "anomalies_removed": {"probe": [], "build": []}}
+
+    index = build_index(iter_csv_rows(build_csv_file), build_key_col)
+    build_prints = {key: row_fingerprint(row) for key, row in index.items()}
+    probe_prints = {}
+    probe_order = []
+    for row in iter_csv_rows(probe_csv_file):
+        probe_order.append(row[probe_key_col])
+        probe_prints[row[probe_key_col]] = row_fingerprint(row)
+    unique_keys = len(probe_prints) == len(probe_order)
+
+    full_rebuild = state is None or not unique_keys or stamps["joined"] is None
+    if full_rebuild:
+        state = {"probe": {}, "build": {}, "probe_order": [],
+                 "anomalies": {"probe": [], "build": []}}
+    probe_added, probe_removed, probe_changed = _changed_keys(state["probe"], probe_prints)
+    build_added, build_removed, build_changed = _changed_keys(state["build"], build_prints)
+    dirty = probe_added | probe_changed | build_added | build_removed | build_changed
+    order_changed = probe_order != state["probe_order"]
+    # A joined file edited since the last run cannot be trusted for reuse
+    joined_intact = state.get("stamps", {}).get("joined") == stamps["joined"]
+
+    rejoined = 0
+    written = None
+    if full_rebuild or dirty or probe_removed or order_changed or not joined_intact:
+        # The previous output holds the joined rows of the kept keys in probe
+        # order; if that order still holds, it is read in step with the probe file
+        kept = {key for key in probe_order if key in index and key not in dirty}
+        reuse = (not full_rebuild and joined_intact and
+                 _same_order(state["probe_order"], probe_order, kept))
+
+        def joined_rows():
+            nonlocal rejoined
+            previous = iter_csv_rows(joined_csv_file) if reuse else iter(())
+            for row in iter_csv_rows(probe_csv_file):
+                key = row[probe_key_col]
+                if reuse and key not in dirty:
+                    if key in kept:
+                        # Skip the rows of keys that were removed or are re-joined
+                        for old_row in previous:
+                            if old_row[probe_key_col] == key:
+                                yield old_row
+                                break
+                    continue
+                rejoined += 1
+                match = index.get(key)
+                if match is not None:
+                    yield row + _without_key(match, build_key_col)
+
+        temp_name = joined_csv_file + ".tmp"
+        written = write_csv_rows(joined_rows(), temp_name)
+        os.replace(temp_name, joined_csv_file)
+        stamps["joined"] = file_stamps.file_stamp(joined_csv_file)
+
+    anomalies = {"probe": sorted(key for key in probe_prints if key not in index),
+                 "build": sorted(key for key in index if key not in probe_prints)}
+    old_anomalies = state["anomalies"]
+    report = {
+        "full_rebuild": full_rebuild,
+        "probe_added": sorted(probe_added), "probe_removed": sorted(probe_removed),
+        "probe_changed": sorted(probe_changed),
+        "build_added": sorted(build_added), "build_removed": sorted(build_removed),
+        "build_changed": sorted(build_changed),
+        "rejoined": rejoined, "written": written,
+        "anomalies_added": {side: sorted(set(anomalies[side]) - set(old_anomalies[side]))
+                            for side in anomalies},
+        "anomalies_removed": {side: sorted(set(old_anomalies[side]) - set(anomalies[side]))
+                              for side in anomalies},
+    }
+    with open(state_file, "w") as state_out:
+        json.dump({"stamps": stamps,
+                   "probe": probe_prints if unique_keys else {}, "build": build_prints,
+                   "probe_order": probe_order if unique_keys else [],
+                   "anomalies": anomalies}, state_out)
+    return report
@@ -0,0 +1,21 @@
+"""
+Version stamps for the files read and written by the practice project
+
+A stamp records the modification time and size of a file.  Cached or
+derived files store the stamps of their sources (as JSON), and are rebuilt
+when a source's current stamp no longer matches the stored one.
+"""
+
+import os
+
+
+def file_stamp(file_name):
+    """
+    Return a dictionary with the modification time and size of the file
+    file_name, or None if it does not exist
+    """
+    try:
+        stat = os.stat(file_name)
+    except OSError:
+        return None
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
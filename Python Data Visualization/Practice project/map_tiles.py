@@ -0,0 +1,255 @@
+"""
+Tile-based, zoom-aware drawing of the county map PNGs with matplotlib
+
+draw_USA_map decodes the whole PNG with plt.imread and redraws all of it with
+imshow on every pan or zoom.  build_tile_pyramid decodes the image once and
+cuts it into square tiles at several zoom levels (each level half the size of
+the next), saved as NumPy .npy files in a sidecar directory next to the PNG
+(<file>.tiles/).  A TiledMap only reads the small metadata file at startup;
+tiles are memory-mapped on demand, and only the ones visible at the zoom level
+matching the current view are drawn.  draw_points overlays any number of
+scatter points in a single scatter call.
+
+Coordinates are pixels of the full-resolution image, so points given in SVG
+coordinates (USA_SVG_SIZE) are rescaled with svg_to_pixels.
+"""
+
+import json
+import math
+import os
+import numpy as np
+import matplotlib.pyplot as plt
+import file_stamps
+
+TILE_SIZE = 256
+TILE_SUFFIX = ".tiles"
+TILE_VERSION = 1
+
+# Size of USA_Counties_2014.svg, the coordinate space of the county centers
+USA_SVG_SIZE = [555, 352]
+
+# Maximum number of tiles kept open by a TiledMap
+TILE_CACHE_SIZE = 256
+
+
+def _halve(image):
+    """
+    Given an image array of shape (rows, columns, bands), return the image at
+    half the resolution, each pixel the mean of a 2x2 block.  Odd sizes are
+    handled by repeating the last row or column
+    """
+    if image.shape[0] % 2:
+        image = np.concatenate([image, image[-1:]], axis=0)
+    if image.shape[1] % 2:
+        image = np.concatenate([image, image[:, -1:]], axis=1)
+    return (image[0::2, 0::2] + image[1::2, 0::2] +
+            image[0::2, 1::2] + image[1::2, 1::2]) / 4
+
+
+def tile_name(cache_dir, zoom, row, col):
+    """
+    Return the name of the file holding tile (row, col) of the given zoom level
+    """
+    return os.path.join(cache_dir, str(zoom), str(row) + "_" + str(col) + ".npy")
+
+
+def build_tile_pyramid(map_name, tile_size=TILE_SIZE, cache_dir=None):
+    """
+    Given the name of a PNG map, decode it once and write its tile pyramid to
+    cache_dir (by default the map name plus TILE_SUFFIX).  The highest zoom
+    level is the full-resolution image; zoom level 0 is the smallest one that
+    fits in a single tile.  Any previous meta.json is deleted before the first
+    tile is saved and the new one after the last, so load_tile_meta rebuilds
+    a pyramid left half-written
+    Return the metadata dictionary
+    """
+    if cache_dir is None:
+        cache_dir = map_name + TILE_SUFFIX
+    stamp = file_stamps.file_stamp(map_name)
+    with open(map_name, 'rb') as map_file:
+        image = plt.imread(map_file)
+    if image.ndim == 2:
+        image = image[:, :, np.newaxis]
+    height, width, bands = image.shape
+    max_zoom = max(0, math.ceil(math.log2(max(width, height) / tile_size)))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    meta_name = os.path.join(cache_dir, "meta.json")
+    if os.path.exists(meta_name):
+        os.remove(meta_name)
+    level = image.astype(np.float32)
+    for zoom in range(max_zoom, -1, -1):
+        os.makedirs(os.path.join(cache_dir, str(zoom)), exist_ok=True)
+        for row in range(0, level.shape[0], tile_size):
+            for col in range(0, level.shape[1], tile_size):
+                tile = level[row:row + tile_size, col:col + tile_size]
+                np.save(tile_name(cache_dir, zoom, row // tile_size, col // tile_size),
+                        tile.astype(image.dtype))
+        if zoom:
+            level = _halve(level)
+
+    meta = {"version": TILE_VERSION, "source": stamp, "tile_size": tile_size,
+            "width": width, "height": height, "bands": bands, "max_zoom": max_zoom}
+    with open(meta_name, "w") as meta_file:
+        json.dump(meta, meta_file)
+    return meta
+
+
+def load_tile_meta(map_name, tile_size=TILE_SIZE, cache_dir=None):
+    """
+    Return the metadata of the tile pyramid of the PNG map_name, building the
+    pyramid first if it is missing, was built with another tile size or is
+    older than the map
+    """
+    if cache_dir is None:
+        cache_dir = map_name + TILE_SUFFIX
+    try:
+        with open(os.path.join(cache_dir, "meta.json")) as meta_file:
+            meta = json.load(meta_file)
+    except (OSError, ValueError):
+        meta = None
+    if (meta is None or meta.get("version") != TILE_VERSION or
+            meta.get("tile_size") != tile_size or
+            meta.get("source") != file_stamps.file_stamp(map_name)):
+        meta = build_tile_pyramid(map_name, tile_size, cache_dir)
+    return meta
+
+
+def svg_to_pixels(xvals, yvals, width, height, svg_size=USA_SVG_SIZE):
+    """
+    Given x and y coordinates in the SVG coordinate space (sequences or arrays),
+    return them as arrays of pixel coordinates in a width x height image
+    """
+    return (np.asarray(xvals, dtype=float) * width / svg_size[0],
+            np.asarray(yvals, dtype=float) * height / svg_size[1])
+
+
+class TiledMap:
+    """
+    County map drawn from a tile pyramid, redrawn at the matching zoom level
+    whenever the view of its axes changes
+    """
+
+    def __init__(self, map_name, tile_size=TILE_SIZE, cache_dir=None):
+        """
+        map_name  - name of the PNG map
+        tile_size - width and height of the tiles in pixels
+        cache_dir - directory of the tile pyramid, by default next to the map
+        """
+        self.cache_dir = map_name + TILE_SUFFIX if cache_dir is None else cache_dir
+        meta = load_tile_meta(map_name, tile_size, self.cache_dir)
+        self.tile_size = meta["tile_size"]
+        self.width = meta["width"]
+        self.height = meta["height"]
+        self.max_zoom = meta["max_zoom"]
+        self.axes = None
+        self._tiles = {}
+        self._images = {}
+        self._view = None
+
+    def tile(self, zoom, row, col):
+        """
+        Return tile (row, col) of the given zoom level as a memory-mapped array
+        """
+        key = (zoom, row, col)
+        tile = self._tiles.pop(key, None)
+        if tile is None:
+            tile = np.load(tile_name(self.cache_dir, zoom, row, col), mmap_mode="r")
+            if len(self._tiles) >= TILE_CACHE_SIZE:
+                del self._tiles[next(iter(self._tiles))]
+        self._tiles[key] = tile
+        return tile
+
+    def zoom_for(self, view_width, screen_width):
+        """
+        Return the zoom level whose resolution best matches a view view_width
+        full-resolution pixels wide shown on screen_width screen pixels
+        """
+        shrink = max(1.0, view_width / max(screen_width, 1.0))
+        return max(0, self.max_zoom - int(math.floor(math.log2(shrink))))
+
+    def visible_tiles(self, zoom, xmin, xmax, ymin, ymax):
+        """
+        Return a list of (row, col, extent) for the tiles of the given zoom level
+        that overlap the view, with extent the (left, right, bottom, top) of
+        the tile in full-resolution pixels as expected by imshow
+        """
+        scale = 2 ** (self.max_zoom - zoom)
+        span = self.tile_size * scale
+        level_width = math.ceil(self.width / scale)
+        level_height = math.ceil(self.height / scale)
+        first_col = max(0, int(xmin // span))
+        last_col = min(math.ceil(level_width / self.tile_size), int(xmax // span) + 1)
+        first_row = max(0, int(ymin // span))
+        last_row = min(math.ceil(level_height / self.tile_size), int(ymax // span) + 1)
+        tiles = []
+        for row in range(first_row, last_row):
+            for col in range(first_col, last_col):
+                left = col * span
+                top = row * span
+                right = min(left + span, self.width)
+                bottom = min(top + span, self.height)
+                tiles.append((row, col, (left, right, bottom, top)))
+        return tiles
+
+    def draw(self, axes=None):
+        """
+        Draw the whole map into axes (by default the current axes), with
+        autoscaling turned off so later plots keep the view, and redraw it on
+        every pan or zoom
+        """
+        if axes is None:
+            axes = plt.gca()
+        self.axes = axes
+        axes.set_xlim(0, self.width)
+        axes.set_ylim(self.height, 0)
+        axes.set_autoscale_on(False)
+        axes.set_aspect("equal")
+        axes.callbacks.connect("xlim_changed", self._on_view_changed)
+        axes.callbacks.connect("ylim_changed", self._on_view_changed)
+        self.update()
+
+    def _on_view_changed(self, axes):
+        """
+        Callback for a change in the view limits of the axes
+        """
+        self.update()
+
+    def update(self):
+        """
+        Show the tiles for the current view of the axes, loading new tiles
+        and removing those no longer in view
+        """
+        axes = self.axes
+        xmin, xmax = sorted(axes.get_xlim())
+        ymin, ymax = sorted(axes.get_ylim())
+        zoom = self.zoom_for(xmax - xmin, axes.bbox.width)
+        view = (zoom, xmin, xmax, ymin, ymax)
+        if view == self._view:
+            return
+        self._view = view
+        wanted = {}
+        for row, col, extent in self.visible_tiles(zoom, xmin, xmax, ymin, ymax):
+            wanted[(zoom, row, col)] = extent
+        for key in list(self._images):
+            if key not in wanted:
+                self._images.pop(key).remove()
+        for key, extent in wanted.items():
+            if key not in self._images:
+                image = axes.imshow(self.tile(*key), extent=extent, zorder=0,
+                                    interpolation="nearest")
+                self._images[key] = image
+        # imshow resets the view limits to the last tile, restore them
+        axes.set_xlim(xmin, xmax, emit=False)
+        axes.set_ylim(ymax, ymin, emit=False)
+        axes.figure.canvas.draw_idle()
+
+
+def draw_points(axes, xvals, yvals, size=10, color="Red", **kwargs):
+    """
+    Draw scatter points at the given pixel coordinates (sequences or arrays)
+    into axes with one scatter call, above the map tiles
+    Return the matplotlib collection holding the points
+    """
+    return axes.scatter(np.asarray(xvals), np.asarray(yvals), s=size, c=color,
+                        zorder=2, **kwargs)
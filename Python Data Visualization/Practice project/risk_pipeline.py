@@ -0,0 +1,147 @@
+"""
+Chunked, out-of-core trim -> join -> write pipeline for cancer risk files
+
+The week 3 scripts read every table into nested lists before trimming,
+joining and writing it.  run_pipeline streams the risk file instead: rows
+are read in fixed-size batches, trimmed (column selection and an optional
+row filter), sorted by risk with csv_join.external_sort, joined batch by
+batch against the index of the (small) center table and written as they
+come.  The batch size is derived from a memory budget, so files much larger
+than memory go through with bounded memory use.
+
+With the defaults, the trimmed file matches cancer_risk_trimmed_solution.csv
+and the joined file matches cancer_risk_joined_solution.csv:
+    run_pipeline("../../Python Data Analysis/cancer_risk05_v4_county.csv",
+                 "USA_Counties_with_FIPS_and_centers.csv", "cancer_risk_joined.csv",
+                 "cancer_risk_trimmed.csv")
+"""
+
+import csv
+import sys
+from itertools import chain, islice
+import csv_join
+
+# Columns kept by the trim: state, county, FIPS code, population, total cancer risk
+TRIM_COLUMNS = [0, 1, 2, 4, 11]
+TRIM_FIPS_COL = 2
+TRIM_RISK_COL = 4
+CENTER_FIPS_COL = 0
+
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+
+# Number of rows sampled to estimate the memory used by one row
+SAMPLE_ROWS = 1000
+
+# Copies of a batch that can be alive at once: the raw rows, the trimmed rows
+# in the sort buffer and the joined rows being written
+BATCH_COPIES = 3
+
+# Estimated memory used by each open file while merging sorted runs
+MERGE_FILE_BYTES = 64 * 1024
+
+
+def row_bytes(row):
+    """
+    Return an estimate of the memory used by a row (a list of strings)
+    """
+    return sys.getsizeof(row) + sum(sys.getsizeof(field) for field in row)
+
+
+def batch_rows_for_budget(sample, memory_budget):
+    """
+    Given a list of sample rows and a memory budget in bytes, return the
+    number of rows per batch that keeps every batch in flight within budget
+    """
+    if not sample:
+        return 1
+    average = sum(row_bytes(row) for row in sample) / len(sample)
+    return max(1, int(memory_budget // (BATCH_COPIES * average)))
+
+
+def iter_batches(rows, batch_rows):
+    """
+    Yield lists of at most batch_rows consecutive rows from the iterable rows
+    """
+    rows = iter(rows)
+    batch = list(islice(rows, batch_rows))
+    while batch:
+        yield batch
+        batch = list(islice(rows, batch_rows))
+
+
+def trim_batches(batches, columns=TRIM_COLUMNS, row_filter=None):
+    """
+    Given an iterable of row batches, yield each batch with only the given
+    columns of the rows for which row_filter (if any) returns True
+    """
+    for batch in batches:
+        if row_filter is not None:
+            batch = [row for row in batch if row_filter(row)]
+        yield [[row[col] for col in columns] for row in batch]
+
+
+def join_batches(batches, index, probe_key_col, build_key_col):
+    """
+    Given an iterable of probe row batches and an index built with
+    csv_join.build_index, yield the inner join of each batch
+    """
+    for batch in batches:
+        yield list(csv_join.inner_join(batch, index, probe_key_col, build_key_col))
+
+
+def write_batches(batches, file_name):
+    """
+    Write every row of an iterable of batches into a comma-separated CSV file
+    Return the number of rows written
+    """
+    count = 0
+    with open(file_name, 'w', newline='') as csv_file:
+        csv_writer = csv.writer(csv_file, delimiter=',', quoting=csv.QUOTE_MINIMAL)
+        for batch in batches:
+            csv_writer.writerows(batch)
+            count += len(batch)
+    return count
+
+
+def _tee_to_file(batches, file_name):
+    """
+    Yield every batch unchanged while also writing it to file_name
+    """
+    with open(file_name, 'w', newline='') as csv_file:
+        csv_writer = csv.writer(csv_file, delimiter=',', quoting=csv.QUOTE_MINIMAL)
+        for batch in batches:
+            csv_writer.writerows(batch)
+            yield batch
+
+
+def run_pipeline(cancer_csv_file, center_csv_file, joined_csv_file, trimmed_csv_file=None,
+                 memory_budget=DEFAULT_MEMORY_BUDGET, row_filter=None, sort_by_risk=True):
+    """
+    Trim the cancer risk file to TRIM_COLUMNS (keeping only the rows for which
+    row_filter returns True, if given), sort it by decreasing risk unless
+    sort_by_risk is False, join it with the center file on FIPS codes and write
+    the result as joined_csv_file, plus the trimmed table as trimmed_csv_file if
+    given.  The risk file is processed in batches sized to memory_budget (in
+    bytes), and the sort merges at most as many runs at once as the budget
+    allows; only the center file is held in memory as a whole
+    Return a tuple of the batch size and the number of joined rows written
+    """
+    center_index = csv_join.build_index(csv_join.iter_csv_rows(center_csv_file),
+                                        CENTER_FIPS_COL)
+    rows = csv_join.iter_csv_rows(cancer_csv_file)
+    sample = list(islice(rows, SAMPLE_ROWS))
+    batch_rows = batch_rows_for_budget(sample, memory_budget)
+
+    batches = trim_batches(iter_batches(chain(sample, rows), batch_rows),
+                           TRIM_COLUMNS, row_filter)
+    if sort_by_risk:
+        # Spills sorted runs of batch_rows rows to disk; the merge is stable,
+        # so rows with equal risk keep their order in the file
+        trimmed = csv_join.external_sort(chain.from_iterable(batches),
+                                         lambda row: -float(row[TRIM_RISK_COL]), batch_rows,
+                                         max_merge_files=max(2, memory_budget // MERGE_FILE_BYTES))
+        batches = iter_batches(trimmed, batch_rows)
+    if trimmed_csv_file is not None:
+        batches = _tee_to_file(batches, trimmed_csv_file)
+    joined = join_batches(batches, center_index, TRIM_FIPS_COL, CENTER_FIPS_COL)
+    return batch_rows, write_batches(joined, joined_csv_file)
@@ -0,0 +1,134 @@
+"""
+Per-state rollups of the cancer risk columns of a RiskTable
+
+cancer_risk05_v4_county.csv holds one Nationwide row, one Statewide row per
+state and one row per county.  group_by sorts the county rows by group code
+once and then reduces every risk column at the same time with
+np.add.reduceat and np.maximum.reduceat, so a rollup of all risk columns is
+a handful of array operations instead of a Python loop per column and row.
+
+The Statewide rows of the file are the population-weighted means of the
+county rows, rounded to two significant digits, which check_statewide uses
+to validate a rollup.
+"""
+
+import numpy as np
+import risk_table
+
+SUMMARY_ROWS = ("Statewide", "Nationwide")
+
+# The file rounds every value, county and statewide alike, to two significant
+# digits and writes values below about 1e-15 as zero
+CHECK_RTOL = 0.07
+CHECK_ATOL = 5e-15
+
+
+class RiskRollup:
+    """
+    Aggregates of the risk columns per group, one row per non-empty group
+    """
+
+    def __init__(self, groups, counts, population, sums, means, maxima, weighted_means):
+        """
+        groups         - list of group names
+        counts         - int64 array with the number of rows in each group
+        population     - int64 array with the total population of each group
+        sums           - float array of shape (groups, risk columns)
+        means          - float array of shape (groups, risk columns)
+        maxima         - float array of shape (groups, risk columns)
+        weighted_means - float array of shape (groups, risk columns), the
+                         means weighted by population
+        """
+        self.groups = groups
+        self.counts = counts
+        self.population = population
+        self.sums = sums
+        self.means = means
+        self.maxima = maxima
+        self.weighted_means = weighted_means
+
+    def __len__(self):
+        """
+        Number of groups
+        """
+        return len(self.groups)
+
+    def group_index(self, group):
+        """
+        Return the row of the given group in the aggregate arrays
+        """
+        return self.groups.index(group)
+
+
+def group_by(codes, names, population, risks):
+    """
+    Given an integer array of group codes (indices into the list names), the
+    population and the 2D risk array of the same rows, return a RiskRollup
+    with the count, population, sum, mean, max and population-weighted mean
+    of every risk column for each group that has at least one row
+    """
+    if len(codes) == 0:
+        empty = np.zeros((0, risks.shape[1]), dtype=risks.dtype)
+        return RiskRollup([], np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64),
+                          empty, empty, empty, empty)
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    sorted_risks = risks[order]
+    sorted_population = population[order]
+
+    counts = np.diff(np.r_[starts, len(order)])
+    group_population = np.add.reduceat(sorted_population, starts)
+    sums = np.add.reduceat(sorted_risks, starts, axis=0)
+    maxima = np.maximum.reduceat(sorted_risks, starts, axis=0)
+    weighted = np.add.reduceat(sorted_risks * sorted_population[:, np.newaxis], starts, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weighted_means = weighted / group_population[:, np.newaxis]
+    groups = [names[code] for code in sorted_codes[starts].tolist()]
+    return RiskRollup(groups, counts, group_population, sums,
+                      sums / counts[:, np.newaxis], maxima, weighted_means)
+
+
+def county_mask(table):
+    """
+    Return a boolean array selecting the county rows of a RiskTable, that
+    is every row other than the Statewide and Nationwide summaries
+    """
+    return ~np.isin(np.array(table.counties, dtype=object), SUMMARY_ROWS)
+
+
+def rollup_by_state(table):
+    """
+    Given a RiskTable, return a RiskRollup of its county rows by state
+    """
+    mask = county_mask(table)
+    return group_by(table.state_codes[mask], table.state_names,
+                    table.population[mask], table.risks[mask])
+
+
+def check_statewide(table, rollup, rtol=CHECK_RTOL, atol=CHECK_ATOL):
+    """
+    Compare the population and population-weighted means of a state rollup
+    with the Statewide rows of the RiskTable it was computed from
+    Return a list of mismatches as tuples (state, CSV column, file value,
+    computed value); the population is reported as column POPULATION_COL
+    """
+    mismatches = []
+    for idx, county in enumerate(table.counties):
+        if county != "Statewide":
+            continue
+        state = table.state_names[table.state_codes[idx]]
+        if state not in rollup.groups:
+            mismatches.append((state, risk_table.POPULATION_COL,
+                               int(table.population[idx]), 0))
+            continue
+        group = rollup.group_index(state)
+        if rollup.population[group] != table.population[idx]:
+            mismatches.append((state, risk_table.POPULATION_COL,
+                               int(table.population[idx]), int(rollup.population[group])))
+        expected = table.risks[idx]
+        computed = rollup.weighted_means[group]
+        for col in np.flatnonzero(~np.isclose(computed, expected, rtol=rtol, atol=atol)).tolist():
+            mismatches.append((state, risk_table.FIRST_RISK_COL + col,
+                               float(expected[col]), float(computed[col])))
+    return mismatches
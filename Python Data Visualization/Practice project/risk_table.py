@@ -0,0 +1,212 @@
+"""
+Typed, column-oriented loader for cancer_risk05_v4_county.csv
+
+read_csv_file keeps every one of the roughly 90 scientific-notation risk
+values per county as a separate Python string.  load_risk_table parses them
+once into a single NumPy float array (one column per risk), keeps the
+population as an integer column and stores the state and urban/rural flag
+as small categorical code arrays, with interned county names and FIPS codes.
+RiskRow offers lightweight row access for code that still works row by row.
+"""
+
+import csv
+import sys
+from array import array
+import numpy as np
+
+# Column layout of cancer_risk05_v4_county.csv (the file has no header row)
+STATE_COL = 0
+COUNTY_COL = 1
+FIPS_COL = 2
+URBAN_COL = 3
+POPULATION_COL = 4
+FIRST_RISK_COL = 5
+
+
+class RiskTable:
+    """
+    Cancer risk data stored by column
+    """
+
+    def __init__(self, state_codes, state_names, counties, fips_codes,
+                 urban_codes, urban_names, population, risks):
+        """
+        state_codes - int16 array of indices into state_names, one per row
+        state_names - list of distinct state abbreviations
+        counties    - list of interned county names
+        fips_codes  - list of interned FIPS codes
+        urban_codes - int8 array of indices into urban_names, one per row
+        urban_names - list of distinct urban/rural flags
+        population  - int64 array of populations
+        risks       - float array of shape (rows, risk columns)
+        """
+        self.state_codes = state_codes
+        self.state_names = state_names
+        self.counties = counties
+        self.fips_codes = fips_codes
+        self.urban_codes = urban_codes
+        self.urban_names = urban_names
+        self.population = population
+        self.risks = risks
+
+    def __len__(self):
+        """
+        Number of rows
+        """
+        return len(self.counties)
+
+    def __getitem__(self, idx):
+        """
+        Return a RiskRow view of row idx
+        """
+        return RiskRow(self, idx)
+
+    def __iter__(self):
+        """
+        Yield a RiskRow view of every row
+        """
+        for idx in range(len(self)):
+            yield RiskRow(self, idx)
+
+    def states(self):
+        """
+        Return a list with the state abbreviation of every row
+        """
+        return [self.state_names[code] for code in self.state_codes.tolist()]
+
+    def risk_column(self, col):
+        """
+        Given a column index of the CSV file (at least FIRST_RISK_COL),
+        return the risk values in that column as a NumPy array view
+        """
+        return self.risks[:, col - FIRST_RISK_COL]
+
+
+class RiskRow:
+    """
+    View of one row of a RiskTable, indexable like a row of read_csv_file
+    but returning typed values
+    """
+    __slots__ = ("table", "idx")
+
+    def __init__(self, table, idx):
+        self.table = table
+        self.idx = idx
+
+    @property
+    def state(self):
+        """
+        State abbreviation
+        """
+        return self.table.state_names[self.table.state_codes[self.idx]]
+
+    @property
+    def county(self):
+        """
+        County name
+        """
+        return self.table.counties[self.idx]
+
+    @property
+    def fips(self):
+        """
+        FIPS code
+        """
+        return self.table.fips_codes[self.idx]
+
+    @property
+    def urban(self):
+        """
+        Urban/rural flag
+        """
+        return self.table.urban_names[self.table.urban_codes[self.idx]]
+
+    @property
+    def population(self):
+        """
+        Population as an integer
+        """
+        return int(self.table.population[self.idx])
+
+    @property
+    def risks(self):
+        """
+        Array view of the risk values
+        """
+        return self.table.risks[self.idx]
+
+    def __len__(self):
+        """
+        Number of fields, as in the CSV row
+        """
+        return FIRST_RISK_COL + self.table.risks.shape[1]
+
+    def __getitem__(self, col):
+        """
+        Return the typed value of CSV column col in this row
+        """
+        if col < 0:
+            col += len(self)
+        if col == STATE_COL:
+            return self.state
+        if col == COUNTY_COL:
+            return self.county
+        if col == FIPS_COL:
+            return self.fips
+        if col == URBAN_COL:
+            return self.urban
+        if col == POPULATION_COL:
+            return self.population
+        return float(self.table.risks[self.idx, col - FIRST_RISK_COL])
+
+    def __repr__(self):
+        return "RiskRow(" + repr(self.state) + ", " + repr(self.county) + ", " + \
+               repr(self.fips) + ")"
+
+
+def _category_code(categories, names, value):
+    """
+    Return the code of value in the categories dictionary, adding it
+    (and appending it to names) if it is new
+    """
+    code = categories.get(value)
+    if code is None:
+        code = categories[value] = len(names)
+        names.append(value)
+    return code
+
+
+def load_risk_table(file_name, dtype=np.float64):
+    """
+    Given the name of a cancer risk CSV file laid out like
+    cancer_risk05_v4_county.csv, return a RiskTable with the risk columns
+    parsed into a single array of the given dtype (float64 or float32)
+    """
+    state_categories = {}
+    state_names = []
+    urban_categories = {}
+    urban_names = []
+    state_codes = array("h")
+    urban_codes = array("b")
+    counties = []
+    fips_codes = []
+    population = array("q")
+    risks = array("d")
+    num_risks = None
+    with open(file_name, newline='') as csv_file:
+        for row in csv.reader(csv_file, delimiter=','):
+            if num_risks is None:
+                num_risks = len(row) - FIRST_RISK_COL
+            elif len(row) - FIRST_RISK_COL != num_risks:
+                raise ValueError("row " + str(len(counties)) + " of " + file_name +
+                                 " has " + str(len(row)) + " fields")
+            state_codes.append(_category_code(state_categories, state_names, row[STATE_COL]))
+            urban_codes.append(_category_code(urban_categories, urban_names, row[URBAN_COL]))
+            counties.append(sys.intern(row[COUNTY_COL]))
+            fips_codes.append(sys.intern(row[FIPS_COL]))
+            population.append(int(row[POPULATION_COL]))
+            risks.extend(map(float, row[FIRST_RISK_COL:]))
+    risk_array = np.frombuffer(risks, dtype=np.float64).reshape(len(counties), num_risks or 0)
+    return RiskTable(np.frombuffer(state_codes, dtype=np.int16), state_names, counties,
+                     fips_codes, np.frombuffer(urban_codes, dtype=np.int8), urban_names,
+                     np.frombuffer(population, dtype=np.int64), risk_array.astype(dtype))
@@ -8,6 +8,8 @@ about the expected behavior of the program.
 
 import csv
 import pygal
+import gdp_store
+import render_output
 
 
 def read_csv_as_nested_dict(filename, keyfield, separator, quote):
@@ -71,31 +73,29 @@ def build_plot_dict(gdpinfo, country_list):
       CSV file should still be in the output dictionary, but
       with an empty XY plot value list.
     """
-    country_gdp = {}
-    data_dict = read_csv_as_nested_dict(gdpinfo["gdpfile"], gdpinfo["country_name"], 
-                                        gdpinfo["separator"], gdpinfo["quote"])
-    for country in country_list:
-        if country in data_dict:
-            country_gdp[country] = build_plot_values(gdpinfo, data_dict[country])
-        else:
-            country_gdp[country] = []
-    return country_gdp
+    store = gdp_store.load_gdp_store(gdpinfo)
+    return store.plot_dict(gdpinfo, country_list)
 
 
-def render_xy_plot(gdpinfo, country_list, plot_file):
+def render_xy_plot(gdpinfo, country_list, plot_file, compress=False):
     """
     Inputs:
       gdpinfo      - GDP data information dictionary
       country_list - List of strings that are country names
-      plot_file    - String that is the output plot file name
+      plot_file    - String that is the output plot file name, a binary
+                     stream, or None
+      compress     - If True, gzip the SVG output
 
     Output:
-      Returns None.
+      If plot_file is None, returns the SVG as bytes.  Otherwise returns
+      True if the plot was written, or False if plot_file was already up
+      to date for the same GDP data and was left untouched.
 
     Action:
       Creates an SVG image of an XY plot for the GDP data
       specified by gdpinfo for the countries in country_list.
-      The image will be stored in a file named by plot_file.
+      The image will be stored in a file named by plot_file, or
+      written to plot_file if it is a stream.
     """
     country_gdp = build_plot_dict(gdpinfo, country_list)
     xyplot = pygal.XY(height=400)
@@ -104,7 +104,8 @@ def render_xy_plot(gdpinfo, country_list, plot_file):
     for country in country_list:
         coords = country_gdp[country]
         xyplot.add(country, coords)
-    xyplot.render_in_browser()
+    content_hash = render_output.chart_hash(xyplot)
+    return render_output.render_chart(xyplot, plot_file, compress, content_hash)
 
 
 def test_render_xy_plot():
@@ -7,8 +7,9 @@ about the expected behavior of the program.
 """
 
 import csv
-import math
 import pygal
+import gdp_store
+import render_output
 
 
 def read_csv_as_nested_dict(filename, keyfield, separator, quote):
@@ -73,33 +74,25 @@ def build_map_dict_by_name(gdpinfo, plot_countries, year):
       codes from plot_countries that were found in the GDP data file, but
       have no GDP data for the specified year.
     """
-    code_gdp_dict = {}
-    unfound_code_set = set()
-    no_data_code_set = set()
-    data_dict = read_csv_as_nested_dict(gdpinfo["gdpfile"], gdpinfo["country_name"], 
-                                        gdpinfo["separator"], gdpinfo["quote"])
-    for country_code, country_name in plot_countries.items():
-        if country_name not in data_dict:
-            unfound_code_set.add(country_code)
-        else:
-            if data_dict[country_name][year] == "":
-                no_data_code_set.add(country_code)
-            else:
-                code_gdp_dict[country_code] = math.log10(float(data_dict[country_name][year]))
-    return code_gdp_dict, unfound_code_set, no_data_code_set
+    store = gdp_store.load_gdp_store(gdpinfo)
+    return store.map_dict_by_name(plot_countries, year)
 
 
-def render_world_map(gdpinfo, plot_countries, year, map_file):
+def render_world_map(gdpinfo, plot_countries, year, map_file, compress=False):
     """
     Inputs:
       gdpinfo        - A GDP information dictionary
       plot_countries - Dictionary whose keys are plot library country codes
                        and values are the corresponding country name
       year           - String year to create GDP mapping for
-      map_file       - Name of output file to create
+      map_file       - Name of output file to create, a binary
+                       stream, or None
+      compress       - If True, gzip the SVG output
 
     Output:
-      Returns None.
+      If map_file is None, returns the SVG as bytes.  Otherwise returns
+      True if the map was written, or False if map_file was already up
+      to date for the same GDP data and was left untouched.
 
     Action:
       Creates a world map plot of the GDP data for the given year and
@@ -107,12 +100,10 @@ def render_world_map(gdpinfo, plot_countries, year, map_file):
     """
     code_gdp_dict, unfound_code_set, no_data_code_set = \
                     build_map_dict_by_name(gdpinfo, plot_countries, year)
-    world_map = pygal.maps.world.World()
-    world_map.title = "GDP by country for " + year + " (log scale), unified by common country name"
-    world_map.add("GDP for" + year, code_gdp_dict)
-    world_map.add("Missing from Worldmap", unfound_code_set)
-    world_map.add("No GDP data", no_data_code_set)
-    world_map.render_in_browser()
+    world_map = render_output.world_map_chart(year, code_gdp_dict, unfound_code_set,
+                                              no_data_code_set)
+    content_hash = render_output.chart_hash(world_map)
+    return render_output.render_chart(world_map, map_file, compress, content_hash)
 
 
 def test_render_world_map():
@@ -149,5 +140,5 @@ def test_render_world_map():
 # out when submitting to OwlTest/CourseraTest.
 
 # =============================================================================
-test_render_world_map()
+#test_render_world_map()
 # =============================================================================
@@ -7,8 +7,10 @@ about the expected behavior of the program.
 """
 
 import csv
-import math
 import pygal
+import country_codes
+import gdp_store
+import render_output
 
 def read_csv_as_nested_dict(filename, keyfield, separator, quote):
     """
@@ -88,25 +90,8 @@ def reconcile_countries_by_code(codeinfo, plot_countries, gdp_countries):
       the codes with the exact same case as they have in
       plot_countries and gdp_countries.
     """
-    code_reconcile_dict = {}
-    unfound_code_set = set()
-    convert_dict = build_country_code_converter(codeinfo)
-    convert_dict_casefold = {}
-    for key, value in convert_dict.items():
-        convert_dict_casefold[key.casefold()] = value.casefold()
-    gdp_code_case_convert = {} #map casefold data_code to original data_code
-    for key in gdp_countries:
-        gdp_code_case_convert[key.casefold()] = key
-    for plot_code in plot_countries:
-        if plot_code.casefold() in convert_dict_casefold:        
-            data_code = convert_dict_casefold[plot_code.casefold()]
-            if data_code in gdp_code_case_convert:
-                code_reconcile_dict[plot_code] = gdp_code_case_convert[data_code]
-            else:
-                unfound_code_set.add(plot_code)
-        else:
-            unfound_code_set.add(plot_code)
-    return code_reconcile_dict, unfound_code_set
+    code_index = country_codes.load_country_code_index(codeinfo)
+    return code_index.reconcile(plot_countries, gdp_countries)
 
 
 def build_map_dict_by_code(gdpinfo, codeinfo, plot_countries, year):
@@ -126,45 +111,26 @@ def build_map_dict_by_code(gdpinfo, codeinfo, plot_countries, year):
       codes from plot_countries that were found in the GDP data file, but
       have no GDP data for the specified year.
     """
-    code_gdp_dict = {}
-    unfound_code_set = set()
-    no_data_code_set = set()
-    gdp_countries = read_csv_as_nested_dict(gdpinfo["gdpfile"], gdpinfo["country_code"], 
-                                            gdpinfo["separator"], gdpinfo["quote"])
-
-    convert_dict = build_country_code_converter(codeinfo)
-    convert_dict_casefold = {}
-    for key, value in convert_dict.items():
-        convert_dict_casefold[key.casefold()] = value.casefold()
-    gdp_countries_casefold = {} #map casefold data_code to gdp in year
-    for key, value in gdp_countries.items():
-        gdp_countries_casefold[key.casefold()] = value[year]
-    for plot_code in plot_countries:
-        if plot_code.casefold() in convert_dict_casefold:     
-            data_code = convert_dict_casefold[plot_code.casefold()]
-            if data_code not in gdp_countries_casefold:
-                unfound_code_set.add(plot_code)
-            else:    
-                if gdp_countries_casefold[data_code] == "":
-                    no_data_code_set.add(plot_code)
-                else:
-                    code_gdp_dict[plot_code] = math.log10(float(gdp_countries_casefold[data_code]))
-        else:
-            unfound_code_set.add(plot_code)
-    return code_gdp_dict, unfound_code_set, no_data_code_set
-
-
-def render_world_map(gdpinfo, codeinfo, plot_countries, year, map_file):
+    store = gdp_store.load_gdp_store(gdpinfo)
+    code_index = country_codes.load_country_code_index(codeinfo)
+    return store.map_dict_by_code(code_index, plot_countries, year)
+
+
+def render_world_map(gdpinfo, codeinfo, plot_countries, year, map_file, compress=False):
     """
     Inputs:
       gdpinfo        - A GDP information dictionary
       codeinfo       - A country code information dictionary
       plot_countries - Dictionary mapping plot library country codes to country names
       year           - String year of data
-      map_file       - String that is the output map file name
+      map_file       - String that is the output map file name, a binary
+                       stream, or None
+      compress       - If True, gzip the SVG output
 
     Output:
-      Returns None.
+      If map_file is None, returns the SVG as bytes.  Otherwise returns
+      True if the map was written, or False if map_file was already up
+      to date for the same GDP data and was left untouched.
 
     Action:
       Creates a world map plot of the GDP data in gdp_mapping and outputs
@@ -172,12 +138,10 @@ def render_world_map(gdpinfo, codeinfo, plot_countries, year, map_file):
     """
     code_gdp_dict, unfound_code_set, no_data_code_set = \
                     build_map_dict_by_code(gdpinfo, codeinfo, plot_countries, year)
-    world_map = pygal.maps.world.World()
-    world_map.title = "GDP by country for " + year + " (log scale), unified by common country name"
-    world_map.add("GDP for" + year, code_gdp_dict)
-    world_map.add("Missing from Worldmap", unfound_code_set)
-    world_map.add("No GDP data", no_data_code_set)
-    world_map.render_in_browser()
+    world_map = render_output.world_map_chart(year, code_gdp_dict, unfound_code_set,
+                                              no_data_code_set)
+    content_hash = render_output.chart_hash(world_map)
+    return render_output.render_chart(world_map, map_file, compress, content_hash)
 
 
 
@@ -0,0 +1,168 @@
+"""
+Precompiled country code reconciliation index.
+
+Building the plot code to data code converter means reading
+isp_country_codes.csv and casefolding every code, which the week 4
+project used to redo on every call.  A CountryCodeIndex is built once
+from a codeinfo dictionary, answers lookups in both directions in O(1)
+and can be saved to and loaded from a JSON file.
+"""
+
+import csv
+import json
+import os
+import table_cache
+
+
+class CountryCodeIndex:
+    """
+    Case-insensitive mapping between plot library country codes and
+    the country codes used in the GDP data.
+    """
+
+    def __init__(self, code_pairs):
+        """
+        Inputs:
+          code_pairs - Iterable of (plot code, data code) pairs, or a
+                       dictionary mapping plot codes to data codes.
+                       Later pairs win when codes repeat.
+        """
+        if isinstance(code_pairs, dict):
+            code_pairs = code_pairs.items()
+        self.code_pairs = [(plot_code, data_code) for plot_code, data_code in code_pairs]
+        self.plot_to_data = {}
+        self._plot_fold = {}
+        self._data_fold = {}
+        for plot_code, data_code in self.code_pairs:
+            self.plot_to_data[plot_code] = data_code
+        for plot_code, data_code in self.plot_to_data.items():
+            self._plot_fold[plot_code.casefold()] = data_code
+        for plot_code, data_code in self.plot_to_data.items():
+            if self._plot_fold[plot_code.casefold()] == data_code:
+                self._data_fold.setdefault(data_code.casefold(), []).append(plot_code)
+
+    def lookup(self, plot_code):
+        """
+        Inputs:
+          plot_code - Plot library country code, in any case
+
+        Output:
+          Returns the data code for plot_code, or None if there is none.
+        """
+        return self._plot_fold.get(plot_code.casefold())
+
+    def lookup_many(self, plot_codes):
+        """
+        Inputs:
+          plot_codes - Iterable of plot library country codes
+
+        Output:
+          Returns a list with the data code (or None) for each plot code.
+        """
+        plot_fold = self._plot_fold
+        return [plot_fold.get(plot_code.casefold()) for plot_code in plot_codes]
+
+    def plot_codes_for(self, data_code):
+        """
+        Inputs:
+          data_code - Data country code, in any case
+
+        Output:
+          Returns the list of plot codes that map to data_code.
+        """
+        return list(self._data_fold.get(data_code.casefold(), []))
+
+    def reconcile(self, plot_countries, gdp_countries):
+        """
+        Inputs:
+          plot_countries - Dictionary whose keys are plot library country codes
+                           and values are the corresponding country name
+          gdp_countries  - Dictionary whose keys are country codes used in GDP data
+
+        Output:
+          A tuple containing a dictionary and a set, exactly as returned
+          by reconcile_countries_by_code.
+        """
+        code_reconcile_dict = {}
+        unfound_code_set = set()
+        gdp_fold = {key.casefold(): key for key in gdp_countries}
+        for plot_code, data_code in zip(plot_countries, self.lookup_many(plot_countries)):
+            gdp_code = None if data_code is None else gdp_fold.get(data_code.casefold())
+            if gdp_code is None:
+                unfound_code_set.add(plot_code)
+            else:
+                code_reconcile_dict[plot_code] = gdp_code
+        return code_reconcile_dict, unfound_code_set
+
+    def to_json(self):
+        """
+        Output:
+          Returns a JSON string from which from_json rebuilds the index.
+        """
+        return json.dumps({"code_pairs": self.code_pairs})
+
+    @classmethod
+    def from_json(cls, text):
+        """
+        Inputs:
+          text - String produced by to_json
+
+        Output:
+          Returns the CountryCodeIndex described by text.
+        """
+        return cls(tuple(pair) for pair in json.loads(text)["code_pairs"])
+
+    def save(self, filename):
+        """
+        Inputs:
+          filename - Name of the JSON file to write
+
+        Output:
+          Returns None.
+        """
+        with open(filename, "w") as index_file:
+            index_file.write(self.to_json())
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Inputs:
+          filename - Name of a JSON file written by save
+
+        Output:
+          Returns the CountryCodeIndex stored in filename.
+        """
+        with open(filename, "r") as index_file:
+            return cls.from_json(index_file.read())
+
+
+def build_country_code_index(codeinfo):
+    """
+    Inputs:
+      codeinfo - A country code information dictionary
+
+    Output:
+      Returns a CountryCodeIndex for the code file described by codeinfo.
+    """
+    code_pairs = []
+    with open(codeinfo["codefile"], "r", newline="") as csvfile:
+        csv_dict_data = csv.DictReader(csvfile, delimiter=codeinfo["separator"],
+                                       quotechar=codeinfo["quote"])
+        for row in csv_dict_data:
+            code_pairs.append((row[codeinfo["plot_codes"]], row[codeinfo["data_codes"]]))
+    return CountryCodeIndex(code_pairs)
+
+
+def load_country_code_index(codeinfo):
+    """
+    Inputs:
+      codeinfo - A country code information dictionary
+
+    Output:
+      Returns the CountryCodeIndex for codeinfo, building it on first
+      use and sharing it through the table_cache LRU cache afterwards.
+    """
+    path = os.path.abspath(codeinfo["codefile"])
+    key = (path, os.stat(path).st_mtime_ns, codeinfo["separator"], codeinfo["quote"],
+           ("country_code_index", codeinfo["plot_codes"], codeinfo["data_codes"]))
+    return table_cache.cached(key, lambda: build_country_code_index(codeinfo))
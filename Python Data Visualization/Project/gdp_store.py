@@ -0,0 +1,280 @@
+"""
+Columnar store for the World Bank GDP data.
+
+The GDP file is parsed once into a country index and a float64 matrix
+of countries x years, with NaN marking missing values.  The accessors
+below answer the same questions as build_plot_values, build_plot_dict
+and build_map_dict_by_* by slicing that matrix, so no cell is parsed
+more than once no matter how many years or countries are rendered.
+"""
+
+import csv
+import math
+import os
+import numpy as np
+import country_codes
+import table_cache
+
+
+class GDPStore:
+    """
+    Countries x years matrix of GDP values with lookup indices.
+    """
+
+    def __init__(self, names, codes, years, values):
+        """
+        Inputs:
+          names  - List of country names, one per row of values
+          codes  - List of country codes, one per row of values
+          years  - List of integer years, one per column of values
+          values - float64 array of shape (len(names), len(years))
+                   holding GDP values, NaN where there is no data
+        """
+        self.names = names
+        self.codes = codes
+        self.years = np.array(years, dtype=np.int64)
+        self.values = values
+        # Later rows win, matching read_csv_as_nested_dict
+        self.name_index = {name: row for row, name in enumerate(names)}
+        self.code_index = {code: row for row, code in enumerate(codes)}
+        self.code_fold_index = {code.casefold(): row for code, row in self.code_index.items()}
+        self.year_index = {str(year): col for col, year in enumerate(years)}
+
+    def year_columns(self, min_year, max_year):
+        """
+        Inputs:
+          min_year - First year to include
+          max_year - Last year to include
+
+        Output:
+          Returns an array of the column indices whose year lies
+          between min_year and max_year, inclusive, in year order.
+        """
+        cols = np.nonzero((self.years >= min_year) & (self.years <= max_year))[0]
+        return cols[np.argsort(self.years[cols], kind="stable")]
+
+    def plot_values(self, gdpinfo, row):
+        """
+        Inputs:
+          gdpinfo - GDP data information dictionary
+          row     - Row index of a country in the store
+
+        Output:
+          Returns a list of tuples of the form (year, GDP) for the years
+          between "min_year" and "max_year", inclusive, from gdpinfo that
+          have data.  The year will be an integer and the GDP will be a
+          float.
+        """
+        cols = self.year_columns(gdpinfo["min_year"], gdpinfo["max_year"])
+        gdps = self.values[row, cols]
+        present = ~np.isnan(gdps)
+        return list(zip(self.years[cols][present].tolist(), gdps[present].tolist()))
+
+    def plot_dict(self, gdpinfo, country_list):
+        """
+        Inputs:
+          gdpinfo      - GDP data information dictionary
+          country_list - List of strings that are country names
+
+        Output:
+          Returns a dictionary whose keys are the country names in
+          country_list and whose values are lists of XY plot values.
+          Countries that are not in the store map to an empty list.
+        """
+        country_gdp = {}
+        for country in country_list:
+            if country in self.name_index:
+                country_gdp[country] = self.plot_values(gdpinfo, self.name_index[country])
+            else:
+                country_gdp[country] = []
+        return country_gdp
+
+    def gdp_column(self, year):
+        """
+        Inputs:
+          year - String year
+
+        Output:
+          Returns a list with every country's GDP in year as a float,
+          NaN where there is no data.
+        """
+        return self.values[:, self.year_index[year]].tolist()
+
+    def map_dict_by_name(self, plot_countries, year):
+        """
+        Inputs:
+          plot_countries - Dictionary whose keys are plot library country codes
+                           and values are the corresponding country name
+          year           - String year to create GDP mapping for
+
+        Output:
+          A tuple containing a dictionary and two sets, as returned by
+          build_map_dict_by_name.  A GDP of zero or below, which has no
+          log, counts as no data.
+        """
+        code_gdp_dict = {}
+        unfound_code_set = set()
+        no_data_code_set = set()
+        gdps = self.gdp_column(year)
+        for country_code, country_name in plot_countries.items():
+            row = self.name_index.get(country_name)
+            if row is None:
+                unfound_code_set.add(country_code)
+            elif not gdps[row] > 0:
+                no_data_code_set.add(country_code)
+            else:
+                code_gdp_dict[country_code] = math.log10(gdps[row])
+        return code_gdp_dict, unfound_code_set, no_data_code_set
+
+    def code_rows(self, code_converter, plot_codes):
+        """
+        Inputs:
+          code_converter - CountryCodeIndex, or dictionary mapping plot library
+                           country codes to the country codes used in the GDP data
+          plot_codes     - Iterable of plot library country codes
+
+        Output:
+          Returns a list with the store row for each plot code, or None
+          for codes that cannot be found.  Codes are compared in a
+          case-insensitive way.
+        """
+        if not isinstance(code_converter, country_codes.CountryCodeIndex):
+            code_converter = country_codes.CountryCodeIndex(code_converter)
+        code_fold_index = self.code_fold_index
+        return [None if data_code is None else code_fold_index.get(data_code.casefold())
+                for data_code in code_converter.lookup_many(plot_codes)]
+
+    def map_dict_by_code(self, code_converter, plot_countries, year):
+        """
+        Inputs:
+          code_converter - CountryCodeIndex, or dictionary mapping plot library
+                           country codes to the country codes used in the GDP data
+          plot_countries - Dictionary mapping plot library country codes to country names
+          year           - String year for which to create GDP mapping
+
+        Output:
+          A tuple containing a dictionary and two sets, as returned by
+          build_map_dict_by_code.  Codes are compared in a
+          case-insensitive way.  A GDP of zero or below, which has no
+          log, counts as no data.
+        """
+        code_gdp_dict = {}
+        unfound_code_set = set()
+        no_data_code_set = set()
+        gdps = self.gdp_column(year)
+        for plot_code, row in zip(plot_countries, self.code_rows(code_converter, plot_countries)):
+            if row is None:
+                unfound_code_set.add(plot_code)
+            elif not gdps[row] > 0:
+                no_data_code_set.add(plot_code)
+            else:
+                code_gdp_dict[plot_code] = math.log10(gdps[row])
+        return code_gdp_dict, unfound_code_set, no_data_code_set
+
+    def log_gdp_by_code(self, code_converter, plot_countries):
+        """
+        Inputs:
+          code_converter - CountryCodeIndex, or dictionary mapping plot library
+                           country codes to the country codes used in the GDP data
+          plot_countries - Dictionary mapping plot library country codes to country names
+
+        Output:
+          A tuple (plot_codes, years, log_gdp, unfound, no_data) covering
+          every year in one pass.  plot_codes is the list of plot codes
+          and years the array of years.  log_gdp is a float64 array of
+          shape (len(plot_codes), len(years)) holding the log (base 10)
+          of the GDP, NaN where there is none.  unfound and no_data are
+          boolean masks of the same shape marking the codes missing from
+          the GDP data and the codes found but without data that year.
+          As in map_dict_by_code, a GDP of zero or below counts as no
+          data.
+        """
+        plot_codes = list(plot_countries)
+        rows = self.code_rows(code_converter, plot_codes)
+        found = np.array([row is not None for row in rows], dtype=bool)
+        row_idx = np.array([row if row is not None else 0 for row in rows], dtype=np.intp)
+        gdps = self.values[row_idx]
+        gdps[~found] = np.nan
+        positive = gdps > 0
+        log_gdp = np.full(gdps.shape, np.nan)
+        np.log10(gdps, out=log_gdp, where=positive)
+        unfound = np.broadcast_to(~found[:, np.newaxis], gdps.shape)
+        no_data = ~positive & found[:, np.newaxis]
+        return plot_codes, self.years, log_gdp, unfound, no_data
+
+
+def year_map_dict(log_gdp_by_code, year):
+    """
+    Inputs:
+      log_gdp_by_code - Tuple returned by GDPStore.log_gdp_by_code
+      year            - Integer or string year
+
+    Output:
+      A tuple containing a dictionary and two sets in the form
+      returned by build_map_dict_by_code, taken from the bulk result
+      for a single year.  Values come from the vectorized log10 and
+      may differ from math.log10 in the last bit.
+    """
+    plot_codes, years, log_gdp, unfound, no_data = log_gdp_by_code
+    col = int(np.nonzero(years == int(year))[0][0])
+    code_gdp_dict = {}
+    unfound_code_set = set()
+    no_data_code_set = set()
+    values = log_gdp[:, col].tolist()
+    for plot_code, value, missing, empty in zip(plot_codes, values, unfound[:, col].tolist(),
+                                                no_data[:, col].tolist()):
+        if missing:
+            unfound_code_set.add(plot_code)
+        elif empty:
+            no_data_code_set.add(plot_code)
+        else:
+            code_gdp_dict[plot_code] = value
+    return code_gdp_dict, unfound_code_set, no_data_code_set
+
+
+def build_gdp_store(gdpinfo):
+    """
+    Inputs:
+      gdpinfo - GDP data information dictionary
+
+    Output:
+      Returns a GDPStore holding every numeric year column of the
+      CSV file described by gdpinfo.
+    """
+    names = []
+    codes = []
+    rows = []
+    with open(gdpinfo["gdpfile"], "r", newline="") as csvfile:
+        csv_reader = csv.reader(csvfile, delimiter=gdpinfo["separator"],
+                                quotechar=gdpinfo["quote"])
+        header = next(csv_reader)
+        name_col = header.index(gdpinfo["country_name"])
+        code_col = header.index(gdpinfo["country_code"])
+        year_cols = [col for col, field in enumerate(header) if field.isnumeric()]
+        for row in csv_reader:
+            names.append(row[name_col])
+            codes.append(row[code_col])
+            rows.append([row[col] if col < len(row) else "" for col in year_cols])
+    values = np.full((len(rows), len(year_cols)), np.nan)
+    for row_idx, row in enumerate(rows):
+        for col_idx, gdp in enumerate(row):
+            if gdp != "":
+                values[row_idx, col_idx] = float(gdp)
+    years = [int(header[col]) for col in year_cols]
+    return GDPStore(names, codes, years, values)
+
+
+def load_gdp_store(gdpinfo):
+    """
+    Inputs:
+      gdpinfo - GDP data information dictionary
+
+    Output:
+      Returns the GDPStore for the file described by gdpinfo, building
+      it on first use and sharing it through the table_cache LRU cache
+      afterwards.  The store must be treated as read-only.
+    """
+    path = os.path.abspath(gdpinfo["gdpfile"])
+    key = (path, os.stat(path).st_mtime_ns, gdpinfo["separator"], gdpinfo["quote"],
+           ("gdp_store", gdpinfo["country_name"], gdpinfo["country_code"]))
+    return table_cache.cached(key, lambda: build_gdp_store(gdpinfo))
@@ -0,0 +1,135 @@
+"""
+Render GDP world maps for many years in parallel.
+
+pygal rendering is CPU-bound and single-threaded, so a sweep over
+every year from 1960 to 2015 is spread over a process pool.  Each
+worker loads the GDP store (and the country code index) once through
+the shared caches; on platforms that fork, the workers inherit the
+tables the parent has already parsed.  The maps are written to disk
+as SVG files and the time taken for each year is reported.
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pygal
+import country_codes
+import gdp_store
+import render_output
+
+# Per-process render settings, filled in by _init_worker
+_WORKER_STATE = {}
+
+
+def _init_worker(gdpinfo, codeinfo, plot_countries):
+    """
+    Inputs:
+      gdpinfo        - A GDP information dictionary
+      codeinfo       - A country code information dictionary, or None
+                       to match countries by name
+      plot_countries - Dictionary mapping plot library country codes to country names
+
+    Output:
+      Returns None.
+
+    Action:
+      Loads the shared read-only tables for this process.
+    """
+    _WORKER_STATE["gdpinfo"] = gdpinfo
+    _WORKER_STATE["codeinfo"] = codeinfo
+    _WORKER_STATE["plot_countries"] = plot_countries
+    _WORKER_STATE["store"] = gdp_store.load_gdp_store(gdpinfo)
+    if codeinfo is not None:
+        _WORKER_STATE["code_index"] = country_codes.load_country_code_index(codeinfo)
+
+
+def _render_year(year, map_file):
+    """
+    Inputs:
+      year     - String year of data
+      map_file - String that is the output map file name
+
+    Output:
+      Returns a tuple (year, map_file, seconds, rendered) where seconds
+      is the time taken to build and write the map and rendered is
+      False if map_file was already up to date and left untouched.
+    """
+    start = time.perf_counter()
+    store = _WORKER_STATE["store"]
+    plot_countries = _WORKER_STATE["plot_countries"]
+    if _WORKER_STATE["codeinfo"] is None:
+        code_gdp_dict, unfound_code_set, no_data_code_set = \
+                        store.map_dict_by_name(plot_countries, year)
+    else:
+        code_gdp_dict, unfound_code_set, no_data_code_set = \
+                        store.map_dict_by_code(_WORKER_STATE["code_index"], plot_countries, year)
+    world_map = render_output.world_map_chart(year, code_gdp_dict, unfound_code_set,
+                                              no_data_code_set)
+    content_hash = render_output.chart_hash(world_map)
+    rendered = render_output.render_chart(world_map, map_file, content_hash=content_hash)
+    return year, map_file, time.perf_counter() - start, rendered
+
+
+def render_world_maps(gdpinfo, codeinfo, plot_countries, years, map_file_pattern,
+                      max_workers=None):
+    """
+    Inputs:
+      gdpinfo          - A GDP information dictionary
+      codeinfo         - A country code information dictionary, or None
+                         to match countries by name
+      plot_countries   - Dictionary mapping plot library country codes to country names
+      years            - List of string years to render
+      map_file_pattern - Output file name with a "{}" placeholder for the year
+      max_workers      - Number of worker processes, defaults to the CPU count
+
+    Output:
+      Returns a list of tuples (year, map_file, seconds, rendered), one
+      per year in the order of years.
+
+    Action:
+      Renders one SVG world map per year in a process pool and writes
+      each to the file named by map_file_pattern for that year.  Maps
+      whose file is already up to date for the same data are skipped.
+    """
+    # Warm the caches so forked workers share the parsed tables
+    _init_worker(gdpinfo, codeinfo, plot_countries)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(gdpinfo, codeinfo, plot_countries)) as executor:
+        futures = [executor.submit(_render_year, year, map_file_pattern.format(year))
+                   for year in years]
+        return [future.result() for future in futures]
+
+
+def test_render_world_maps():
+    """
+    Render every year from 1960 to 2015 and report the timings.
+    """
+    gdpinfo = {
+        "gdpfile": "isp_gdp.csv",
+        "separator": ",",
+        "quote": '"',
+        "min_year": 1960,
+        "max_year": 2015,
+        "country_name": "Country Name",
+        "country_code": "Country Code"
+    }
+
+    codeinfo = {
+        "codefile": "isp_country_codes.csv",
+        "separator": ",",
+        "quote": '"',
+        "plot_codes": "ISO3166-1-Alpha-2",
+        "data_codes": "ISO3166-1-Alpha-3"
+    }
+
+    years = [str(year) for year in range(gdpinfo["min_year"], gdpinfo["max_year"] + 1)]
+    start = time.perf_counter()
+    timings = render_world_maps(gdpinfo, codeinfo, pygal.maps.world.COUNTRIES, years,
+                                "isp_gdp_world_code_{}.svg")
+    for year, map_file, seconds, rendered in timings:
+        action = "Wrote" if rendered else "Kept up-to-date"
+        print(action, map_file, "for", year, "in", round(seconds, 3), "seconds")
+    print("Rendered", len(timings), "maps in", round(time.perf_counter() - start, 3), "seconds")
+
+
+if __name__ == "__main__":
+    test_render_world_maps()
@@ -0,0 +1,167 @@
+"""
+Headless output for pygal charts.
+
+The render_* functions used to call render_in_browser(), which opens a
+browser and leaves temporary files behind.  render_chart writes the
+SVG to a file, to a stream or returns it as bytes, optionally gzip
+compressed.  When writing to a file it can skip rendering altogether
+if the file was already produced from the same inputs, which keeps
+batch rebuilds incremental.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import pygal
+
+HASH_SUFFIX = ".sha256"
+
+
+def _json_default(value):
+    """
+    Inputs:
+      value - Object json cannot encode directly
+
+    Output:
+      Returns a sorted list for sets, so that hashes do not depend on
+      set iteration order.
+    """
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    raise TypeError("cannot hash value of type " + type(value).__name__)
+
+
+def inputs_hash(*inputs):
+    """
+    Inputs:
+      inputs - JSON-compatible values (sets are allowed) that fully
+               determine a chart
+
+    Output:
+      Returns a hex SHA-256 digest of the inputs.
+    """
+    text = json.dumps(inputs, sort_keys=True, default=_json_default)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _config_value(value):
+    """
+    Inputs:
+      value - A chart configuration value
+
+    Output:
+      Returns value if json can encode it, else the qualified name of
+      its class (or of value itself if it is a class), which unlike its
+      repr does not change from one process to the next.
+    """
+    if value is None or isinstance(value, (str, int, float, bool, list, tuple, dict)):
+        return value
+    if not isinstance(value, type):
+        value = type(value)
+    return value.__module__ + "." + value.__qualname__
+
+
+def chart_hash(chart):
+    """
+    Inputs:
+      chart - A pygal chart, with all of its series added
+
+    Output:
+      Returns a hex SHA-256 digest of everything the chart is rendered
+      from: its type, its configuration and attributes such as the
+      title, and the label, options and values of every series.
+    """
+    config = {name: _config_value(value) for name, value in vars(chart.config).items()}
+    attributes = {name: _config_value(value) for name, value in vars(chart).items()
+                  if name not in ("config", "raw_series", "state", "uuid", "xml_filters")}
+    return inputs_hash(_config_value(chart), config, attributes,
+                       [[values, options] for values, options in chart.raw_series])
+
+
+def is_up_to_date(filename, content_hash):
+    """
+    Inputs:
+      filename     - Name of a chart file
+      content_hash - Hash of the inputs the chart would be built from
+
+    Output:
+      Returns True if filename exists and was last written from inputs
+      with the same hash.
+    """
+    if not os.path.exists(filename):
+        return False
+    try:
+        with open(filename + HASH_SUFFIX, "r") as hash_file:
+            return hash_file.read().strip() == content_hash
+    except OSError:
+        return False
+
+
+def render_chart(chart, output=None, compress=False, content_hash=None):
+    """
+    Inputs:
+      chart        - A pygal chart
+      output       - None, a file name, or a binary stream
+      compress     - If True, gzip the SVG (also implied by a file name
+                     ending in ".gz")
+      content_hash - Optional hash of the chart inputs, see chart_hash
+
+    Output:
+      If output is None, returns the SVG as bytes.  Otherwise returns
+      True if the chart was rendered and written, or False if output
+      is a file that is already up to date for content_hash.
+
+    Action:
+      Writes the SVG to the file or stream given by output.  Files are
+      replaced atomically and, when content_hash is given, a sidecar
+      file records the hash for later up-to-date checks.
+    """
+    if isinstance(output, str):
+        compress = compress or output.endswith(".gz")
+        if content_hash is not None:
+            # The same chart written with and without compression differs
+            content_hash = inputs_hash(content_hash, compress)
+            if is_up_to_date(output, content_hash):
+                return False
+    svg = chart.render()
+    if compress:
+        svg = gzip.compress(svg)
+    if output is None:
+        return svg
+    if not isinstance(output, str):
+        output.write(svg)
+        return True
+    temp_name = output + ".tmp"
+    with open(temp_name, "wb") as svg_file:
+        svg_file.write(svg)
+    # Drop the old hash first, so that a crash before the new one is
+    # written leaves the file out of date rather than wrongly up to date
+    if os.path.exists(output + HASH_SUFFIX):
+        os.remove(output + HASH_SUFFIX)
+    os.replace(temp_name, output)
+    if content_hash is not None:
+        with open(temp_name, "w") as hash_file:
+            hash_file.write(content_hash)
+        os.replace(temp_name, output + HASH_SUFFIX)
+    return True
+
+
+def world_map_chart(year, code_gdp_dict, unfound_code_set, no_data_code_set):
+    """
+    Inputs:
+      year             - String year of data
+      code_gdp_dict    - Dictionary mapping plot codes to log GDP values
+      unfound_code_set - Set of plot codes missing from the GDP data
+      no_data_code_set - Set of plot codes without GDP data for year
+
+    Output:
+      Returns the pygal world map of GDP by country for year, as drawn
+      by the week 3 and week 4 projects and by render_batch.
+    """
+    world_map = pygal.maps.world.World()
+    world_map.title = "GDP by country for " + year + " (log scale), unified by common country name"
+    world_map.add("GDP for" + year, code_gdp_dict)
+    world_map.add("Missing from Worldmap", unfound_code_set)
+    world_map.add("No GDP data", no_data_code_set)
+    return world_map
@@ -0,0 +1,85 @@
+"""
+Shared cache of parsed CSV tables for the GDP projects.
+
+Parsing isp_gdp.csv is by far the most expensive step of building a
+plot or a map, and the projects used to repeat it on every call.  The
+tables built from the CSV files (the GDPStore of gdp_store and the
+CountryCodeIndex of country_codes) are kept in a small
+least-recently-used cache so that repeated renders (for example one
+map per year from 1960 to 2015) reuse a single table.
+
+Cached tables are shared between callers and must be treated as
+read-only.
+"""
+
+import os
+from collections import OrderedDict
+
+DEFAULT_CACHE_SIZE = 8
+
+_TABLE_CACHE = OrderedDict()
+_CACHE_SIZE = [DEFAULT_CACHE_SIZE]
+
+
+def cached(key, loader):
+    """
+    Inputs:
+      key    - Hashable tuple identifying the cached value, whose first
+               element is the absolute path of the source file
+      loader - Function of no arguments that builds the value
+
+    Output:
+      Returns the cached value for key, calling loader and storing
+      its result if the key is not present.  The least recently used
+      entry is evicted when the cache grows beyond its size limit.
+    """
+    if key in _TABLE_CACHE:
+        _TABLE_CACHE.move_to_end(key)
+        return _TABLE_CACHE[key]
+    value = loader()
+    _TABLE_CACHE[key] = value
+    while len(_TABLE_CACHE) > _CACHE_SIZE[0]:
+        _TABLE_CACHE.popitem(last=False)
+    return value
+
+
+def invalidate(filename=None):
+    """
+    Inputs:
+      filename - Name of CSV file, or None
+
+    Output:
+      Returns the number of cache entries removed.
+
+    Action:
+      Drops every cached table built from filename, or every cached
+      table if filename is None.
+    """
+    if filename is None:
+        count = len(_TABLE_CACHE)
+        _TABLE_CACHE.clear()
+        return count
+    path = os.path.abspath(filename)
+    stale = [key for key in _TABLE_CACHE if key[0] == path]
+    for key in stale:
+        del _TABLE_CACHE[key]
+    return len(stale)
+
+
+def set_cache_size(size):
+    """
+    Inputs:
+      size - Maximum number of tables to keep (at least 1)
+
+    Output:
+      Returns None.
+
+    Action:
+      Changes the cache size limit, evicting the least recently used
+      tables if the cache is now too large.
+    """
+    if size < 1:
+        raise ValueError("cache size must be at least 1")
+    _CACHE_SIZE[0] = size
+    while len(_TABLE_CACHE) > size:
+        _TABLE_CACHE.popitem(last=False)
@@ -0,0 +1,249 @@
+"""
+Binary columnar cache files for CSV datasets.
+
+The first time a CSV file is loaded with load_csv_columns, its columns are
+parsed and written to a sidecar directory next to it (<file>.cols/) as
+NumPy .npy buffers: numeric columns as float64 or int64 arrays, text
+columns as a dictionary-encoded string table (int32 codes into a single
+UTF-8 buffer with offsets).  Later loads memory-map those buffers instead
+of reparsing the text, as long as the CSV file has not changed since.
+
+Usage, from the folder holding each dataset:
+    load_csv_columns("Master_2016.csv")
+    load_csv_columns("cancer_risk05_v4_county.csv", header=False)
+    load_csv_columns("isp_gdp.csv")
+    load_csv_columns("USA_Counties_with_FIPS_and_centers.csv", header=False)
+"""
+
+import csv
+import json
+import os
+import re
+import numpy as np
+
+CACHE_SUFFIX = ".cols"
+CACHE_VERSION = 3
+
+# A column is cached as int64 or float64 only if every value is stored
+# exactly; codes with a leading zero such as FIPS codes ("01001") and
+# integers outside the int64 range or past float64 precision stay text
+INT64_MIN = -(1 << 63)
+INT64_MAX = (1 << 63) - 1
+_INT_PATTERN = re.compile(r"[-+]?(?:0|[1-9]\d*)\Z")
+_FLOAT_PATTERN = re.compile(r"[-+]?(?:(?:0|[1-9]\d*)(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?\Z")
+
+
+class StringColumn:
+    """
+    Text column stored as codes into a table of distinct strings
+    """
+
+    def __init__(self, codes, buffer, offsets):
+        """
+        Inputs:
+          codes   - int32 array with one index into the string table per row
+          buffer  - uint8 array holding the UTF-8 bytes of every distinct string
+          offsets - int64 array such that string i is buffer[offsets[i]:offsets[i + 1]]
+        """
+        self.codes = codes
+        self.buffer = buffer
+        self.offsets = offsets
+        self._strings = None
+
+    def strings(self):
+        """
+        Output:
+          Returns the list of distinct strings, decoded on first use.
+        """
+        if self._strings is None:
+            data = self.buffer.tobytes()
+            bounds = self.offsets.tolist()
+            self._strings = [data[bounds[idx]:bounds[idx + 1]].decode("utf-8")
+                             for idx in range(len(bounds) - 1)]
+        return self._strings
+
+    def __len__(self):
+        """
+        Output:
+          Returns the number of rows.
+        """
+        return len(self.codes)
+
+    def __getitem__(self, idx):
+        """
+        Output:
+          Returns the string in row idx.
+        """
+        return self.strings()[self.codes[idx]]
+
+    def tolist(self):
+        """
+        Output:
+          Returns the column as a list of strings, one per row.
+        """
+        strings = self.strings()
+        return [strings[code] for code in self.codes.tolist()]
+
+
+def _column_kind(values):
+    """
+    Inputs:
+      values - list of strings from one column
+
+    Output:
+      Returns "int" if every value is an integer in the int64 range,
+      "float" if every value is a number or empty (and at least one is
+      a number) and every integer among them converts to float exactly,
+      else "str".
+    """
+    if (values and all(_INT_PATTERN.match(value) for value in values) and
+            all(INT64_MIN <= int(value) <= INT64_MAX for value in values)):
+        return "int"
+    present = [value for value in values if value != ""]
+    if present and all(_FLOAT_PATTERN.match(value) for value in present):
+        if all(float(value) == int(value) for value in present
+               if _INT_PATTERN.match(value)):
+            return "float"
+    return "str"
+
+
+def _string_table(values):
+    """
+    Inputs:
+      values - list of strings
+
+    Output:
+      Returns a tuple (codes, buffer, offsets) dictionary-encoding values.
+    """
+    table = {}
+    codes = np.array([table.setdefault(value, len(table)) for value in values],
+                     dtype=np.int32)
+    encoded = [value.encode("utf-8") for value in table]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(data) for data in encoded], out=offsets[1:])
+    buffer = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return codes, buffer, offsets
+
+
+def _source_stamp(csv_file_name):
+    """
+    Output:
+      Returns a dictionary identifying the current version of the CSV file.
+    """
+    stat = os.stat(csv_file_name)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _read_columns(csv_file_name, separator, quote, header):
+    """
+    Output:
+      Returns a tuple of the list of column names and the list of
+      columns, each a list of strings.  Short rows are padded with
+      empty strings.
+    """
+    with open(csv_file_name, "r", newline="") as csvfile:
+        rows = list(csv.reader(csvfile, delimiter=separator, quotechar=quote))
+    names = rows.pop(0) if header and rows else []
+    width = max([len(names)] + [len(row) for row in rows])
+    columns = [[row[col] if col < len(row) else "" for row in rows] for col in range(width)]
+    names = names + [str(col) for col in range(len(names), width)]
+    return names, columns
+
+
+def write_cache(csv_file_name, separator=",", quote='"', header=True):
+    """
+    Inputs:
+      csv_file_name - Name of CSV file
+      separator     - Character that separates fields
+      quote         - Character used to optionally quote fields
+      header        - True if the first row holds the column names
+
+    Output:
+      Returns None.
+
+    Action:
+      Parses the CSV file and writes its columns to the sidecar cache
+      directory.  meta.json, which lists the column kinds that
+      load_csv_columns needs to find the column files, is removed first
+      and saved only once every column file is in place.
+    """
+    stamp = _source_stamp(csv_file_name)
+    names, columns = _read_columns(csv_file_name, separator, quote, header)
+    cache_dir = csv_file_name + CACHE_SUFFIX
+    os.makedirs(cache_dir, exist_ok=True)
+    meta_name = os.path.join(cache_dir, "meta.json")
+    if os.path.exists(meta_name):
+        os.remove(meta_name)
+    kinds = []
+    for col, values in enumerate(columns):
+        kind = _column_kind(values)
+        kinds.append(kind)
+        prefix = os.path.join(cache_dir, str(col))
+        if kind == "int":
+            np.save(prefix + ".npy", np.array([int(value) for value in values], dtype=np.int64))
+        elif kind == "float":
+            np.save(prefix + ".npy", np.array([float(value) if value != "" else np.nan
+                                               for value in values], dtype=np.float64))
+        else:
+            codes, buffer, offsets = _string_table(values)
+            np.save(prefix + ".codes.npy", codes)
+            np.save(prefix + ".buffer.npy", buffer)
+            np.save(prefix + ".offsets.npy", offsets)
+    meta = {"version": CACHE_VERSION, "source": stamp, "separator": separator,
+            "quote": quote, "header": header, "names": names, "kinds": kinds}
+    with open(meta_name, "w") as meta_file:
+        json.dump(meta, meta_file)
+
+
+def _read_meta(csv_file_name, separator, quote, header):
+    """
+    Output:
+      Returns the cache metadata if the sidecar cache is valid for the
+      current CSV file and settings, else None.
+    """
+    meta_name = os.path.join(csv_file_name + CACHE_SUFFIX, "meta.json")
+    try:
+        with open(meta_name, "r") as meta_file:
+            meta = json.load(meta_file)
+    except (OSError, ValueError):
+        return None
+    if (meta.get("version") != CACHE_VERSION or
+            meta.get("source") != _source_stamp(csv_file_name) or
+            (meta.get("separator"), meta.get("quote"), meta.get("header")) !=
+            (separator, quote, header)):
+        return None
+    return meta
+
+
+def load_csv_columns(csv_file_name, separator=",", quote='"', header=True):
+    """
+    Inputs:
+      csv_file_name - Name of CSV file
+      separator     - Character that separates fields
+      quote         - Character used to optionally quote fields
+      header        - True if the first row holds the column names,
+                      otherwise columns are named "0", "1", ...
+
+    Output:
+      Returns a dictionary mapping column names, in file order, to
+      read-only memory-mapped columns: float64 arrays (NaN for empty
+      fields), int64 arrays, or StringColumn objects for text.
+
+      The sidecar cache is (re)built when it is missing or older than
+      the CSV file.
+    """
+    meta = _read_meta(csv_file_name, separator, quote, header)
+    if meta is None:
+        write_cache(csv_file_name, separator, quote, header)
+        meta = _read_meta(csv_file_name, separator, quote, header)
+    cache_dir = csv_file_name + CACHE_SUFFIX
+    columns = {}
+    for col, (name, kind) in enumerate(zip(meta["names"], meta["kinds"])):
+        prefix = os.path.join(cache_dir, str(col))
+        if kind == "str":
+            columns[name] = StringColumn(np.load(prefix + ".codes.npy", mmap_mode="r"),
+                                         np.load(prefix + ".buffer.npy", mmap_mode="r"),
+                                         np.load(prefix + ".offsets.npy", mmap_mode="r"))
+        else:
+            columns[name] = np.load(prefix + ".npy", mmap_mode="r")
+    return columns
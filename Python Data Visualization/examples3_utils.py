@@ -1,7 +1,28 @@
 """
 Frequently used utility functions.
+
+The iter_* functions, unique and the batch helpers return iterators,
+so they can be chained over streams of rows without building lists.
 """
 
+import math
+from itertools import islice
+
+MASK64 = (1 << 64) - 1
+
+def iter_indices(iterable, elem):
+    """
+    Inputs:
+      iterable - Any iterable
+      elem     - Element to look for
+
+    Output:
+      An iterator over the indices at which elem occurs in iterable.
+    """
+    for idx, item in enumerate(iterable):
+        if item == elem:
+            yield idx
+
 def indices(iterable, elem):
     """
     Inputs:
@@ -12,11 +33,7 @@ def indices(iterable, elem):
       A list of indices at which elem occurs in iterable.
       The list will be empty if elem never occurs.
     """
-    result = []
-    for idx, item in enumerate(iterable):
-        if item == elem:
-            result.append(idx)
-    return result
+    return list(iter_indices(iterable, elem))
 
 def remove_dups(lst):
     """
@@ -29,10 +46,169 @@ def remove_dups(lst):
       the first element of each replicated element will
       appear in the output.
     """
-    result = []
-    dups = set()
-    for item in lst:
-        if item not in dups:
-            result.append(item)
-            dups.add(item)
-    return result
+    return list(unique(lst))
+
+def _mix64(value):
+    """
+    Inputs:
+      value - An integer
+
+    Output:
+      Returns a well-mixed 64-bit integer derived from value
+      (the splitmix64 finalizer).
+    """
+    value = (value + 0x9E3779B97F4A7C15) & MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+class BloomFilter:
+    """
+    Set of hashable items in a fixed-size bit array.  Membership
+    tests never miss an added item, but may wrongly report an item
+    that was never added, with probability about error_rate once
+    capacity items have been added.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        """
+        Inputs:
+          capacity   - Number of items the filter is sized for
+          error_rate - False positive rate at capacity, between 0 and 1
+        """
+        capacity = max(1, capacity)
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) /
+                                             math.log(2) ** 2)))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item):
+        """
+        Inputs:
+          item - A hashable object
+
+        Output:
+          Returns an iterator over the bit positions of item
+          (double hashing from two 64-bit hashes).
+        """
+        first = _mix64(hash(item) & MASK64)
+        second = _mix64(first) | 1
+        for idx in range(self.num_hashes):
+            yield (first + idx * second) % self.num_bits
+
+    def add(self, item):
+        """
+        Inputs:
+          item - A hashable object
+
+        Output:
+          Returns True if item was possibly present already,
+          False if it was certainly new.
+        """
+        present = True
+        for pos in self._positions(item):
+            mask = 1 << (pos & 7)
+            if not self.bits[pos >> 3] & mask:
+                present = False
+                self.bits[pos >> 3] |= mask
+        return present
+
+    def __contains__(self, item):
+        """
+        Inputs:
+          item - A hashable object
+
+        Output:
+          Returns True if item was possibly added, False if not.
+        """
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+def unique(iterable, key=None, approximate=False, capacity=1000000, error_rate=0.001):
+    """
+    Inputs:
+      iterable    - Any iterable
+      key         - Function computing the value compared for duplicates,
+                    or None to compare the elements themselves
+      approximate - If True, remember the keys seen in a BloomFilter
+                    instead of a set
+      capacity    - Expected number of distinct keys (approximate mode)
+      error_rate  - False positive rate at capacity (approximate mode)
+
+    Output:
+      An iterator over the elements of iterable without duplicates,
+      in order, keeping the first element with each key.
+
+      The exact mode keeps every distinct key in memory.  The
+      approximate mode uses a fixed amount of memory, but may drop
+      a small fraction (about error_rate) of the distinct elements.
+    """
+    if approximate:
+        seen = BloomFilter(capacity, error_rate)
+        for item in iterable:
+            if not seen.add(item if key is None else key(item)):
+                yield item
+    else:
+        seen = set()
+        for item in iterable:
+            value = item if key is None else key(item)
+            if value not in seen:
+                seen.add(value)
+                yield item
+
+def batched(iterable, size):
+    """
+    Inputs:
+      iterable - Any iterable
+      size     - Number of elements per batch
+
+    Output:
+      An iterator over lists of size consecutive elements of
+      iterable; the last list may be shorter.
+    """
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+def unique_batches(batches, key=None, approximate=False, capacity=1000000, error_rate=0.001):
+    """
+    Inputs:
+      batches - Iterable of lists of elements
+      Other inputs as for unique
+
+    Output:
+      An iterator over the batches with the duplicates removed
+      across all of them, so each key appears only in the first
+      batch holding it.  Batches may become shorter or empty.
+    """
+    if approximate:
+        seen = BloomFilter(capacity, error_rate)
+        for batch in batches:
+            yield [item for item in batch
+                   if not seen.add(item if key is None else key(item))]
+    else:
+        seen = set()
+        for batch in batches:
+            result = []
+            for item in batch:
+                value = item if key is None else key(item)
+                if value not in seen:
+                    seen.add(value)
+                    result.append(item)
+            yield result
+
+def lookup_batches(mapping, batches, default=None):
+    """
+    Inputs:
+      mapping - A dictionary, such as an index from keys to rows
+      batches - Iterable of lists of keys
+      default - Value for keys missing from mapping
+
+    Output:
+      An iterator over lists holding the value of each key of a
+      batch in mapping, or default if the key is missing.
+    """
+    get = mapping.get
+    for batch in batches:
+        yield [get(item, default) for item in batch]